@@ -3,10 +3,38 @@
 Implements Hunter (Bullish), Skeptic (Bearish), and Risk Manager agents
 Integrated with Market Regime Filter (Trụ 1)
 """
+from functools import lru_cache
 from typing import Dict, List, Tuple
 from utils.logger import logger
 from market_regime_filter import MarketRegimeFilter, MarketRegime
 
+# Integer decision codes, published alongside the decision string so
+# consumers can branch without scanning for emoji
+DECISION_BUY = 0         # 🟢
+DECISION_ACCUMULATE = 1  # 🟡
+DECISION_WATCH = 2       # ⚪
+DECISION_EXIT = 3        # 🔴
+
+@lru_cache(maxsize=64)
+def classify_decision(decision: str) -> int:
+    """
+    Map a decision string to its decision code (memoized: the analyzer
+    only ever emits a handful of distinct strings)
+    
+    Args:
+        decision: Decision string, e.g. "🟢 MUA (SIGNAL)"
+        
+    Returns:
+        One of the DECISION_* codes
+    """
+    if '🟢' in decision:
+        return DECISION_BUY
+    if '🟡' in decision:
+        return DECISION_ACCUMULATE
+    if '⚪' in decision:
+        return DECISION_WATCH
+    return DECISION_EXIT
+
 class Agent3Analyzer:
     """Implements the 3-agent analysis framework with Regime Filtering"""
     
@@ -48,6 +76,7 @@ class Agent3Analyzer:
             'bullish_case': bullish_points,
             'bearish_case': bearish_points,
             'decision': decision['action'],
+            'decision_code': decision['code'],
             'confidence': decision['confidence'],
             'reasoning': decision['reasoning']
         }
@@ -55,6 +84,19 @@ class Agent3Analyzer:
         logger.info(f"{symbol} analysis complete: {decision['action']} (Confidence: {decision['confidence']}%)")
         return result
     
+    def analyze_batch(self, data_by_symbol: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        Analyze several symbols in one call
+        
+        Args:
+            data_by_symbol: {symbol: market data}, analyzed in iteration order
+            
+        Returns:
+            {symbol: analysis result} in the same order
+        """
+        analyze = self.analyze
+        return {symbol: analyze(symbol, data) for symbol, data in data_by_symbol.items()}
+    
     def _create_no_trade_result(self, symbol: str, regime_analysis, reason: str) -> Dict:
         """Helper to create no-trade result"""
         return {
@@ -64,6 +106,7 @@ class Agent3Analyzer:
             'bullish_case': [],
             'bearish_case': regime_analysis.reasons,
             'decision': "🔴 ĐỨNG NGOÀI",
+            'decision_code': DECISION_EXIT,
             'confidence': 0,
             'reasoning': reason
         }
@@ -117,16 +160,20 @@ class Agent3Analyzer:
         
         if regime_analysis.can_buy and confidence >= 40: # Lowered threshold as planned
              action = "🟢 MUA (SIGNAL)" # Requires strategy confirmation next
+             code = DECISION_BUY
              reasoning = f"Market thuận lợi, {len(bullish)} tín hiệu tích cực"
         elif regime_analysis.can_sell and confidence < 30:
              action = "🔴 BÁN/CẮT"
+             code = DECISION_EXIT
              reasoning = "Market xấu hoặc tín hiệu yếu"
         else:
              action = "⚪ THEO DÕI"
+             code = DECISION_WATCH
              reasoning = "Chưa đủ điều kiện vào lệnh"
 
         return {
             'action': action,
+            'code': code,
             'confidence': confidence,
             'reasoning': reasoning
         }
@@ -85,7 +85,9 @@ class AutoTradeExecutor:
         
         # Execute Buy
         reason = f"{signal.strategy.value.upper()} Entry (Conf: {signal.confidence}%)"
-        success = self.simulator.buy(symbol, price, pos_value, reason)
+        # One timestamp shared by the simulator trade, journal entry and alert
+        now = datetime.now()
+        success = self.simulator.buy(symbol, price, pos_value, reason, now=now)
         
         if success:
             # Set SL/TP in Safety Manager
@@ -97,7 +99,7 @@ class AutoTradeExecutor:
             
             # Record in Journal (Trụ 4)
             data = {
-                'time': datetime.now(),
+                'time': now,
                 'symbol': symbol,
                 'action': 'BUY',
                 'price': price,
@@ -182,20 +184,23 @@ class AutoTradeExecutor:
     
     def update_trailing_stops(self, current_prices: Dict[str, float]):
         """Update trailing stops based on logic in SafetyManager"""
-        for symbol in self.simulator.positions.keys():
-            if symbol not in current_prices:
+        get_price = current_prices.get
+        highest_prices = self.highest_prices
+        priced_highs = {}
+        
+        for symbol in self.simulator.positions:
+            current_price = get_price(symbol)
+            if current_price is None:
                 continue
             
-            current_price = current_prices[symbol]
-            
             # Update highest price
-            if symbol not in self.highest_prices:
-                self.highest_prices[symbol] = current_price
-            elif current_price > self.highest_prices[symbol]:
-                self.highest_prices[symbol] = current_price
-            
-            # Ask safety manager to update stops if applicable
-            self.safety.update_trailing_stop(symbol, current_price, self.highest_prices[symbol])
+            highest = highest_prices.get(symbol)
+            if highest is None or current_price > highest:
+                highest_prices[symbol] = highest = current_price
+            priced_highs[symbol] = highest
+        
+        # Ask safety manager to update stops if applicable, all in one pass
+        self.safety.update_trailing_stops(priced_highs)
     
     def check_take_profit(self, current_prices: Dict[str, float]) -> List[str]:
         """Check take profit levels (Partial scaling out)"""
@@ -3,6 +3,8 @@ External Data Scraper Module
 Collects data from external sources: commodities, futures, fundamentals, and news
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import feedparser
 from bs4 import BeautifulSoup
 from typing import Dict, Optional, List
@@ -13,15 +15,46 @@ import json
 import re
 
 
+def create_session(pool_size: int = 4) -> requests.Session:
+    """
+    Create a browser-like HTTP session with a keep-alive connection pool
+    
+    One session can be passed to several scrapers so they share connections
+    (e.g. the CafeF fundamentals page and the CafeF RSS feed). Requests that
+    fail to connect or get a 429/5xx are retried twice with backoff; read
+    timeouts are not, and a Retry-After header is ignored in favour of the
+    short backoff, so a slow source still fails within a bounded time.
+    
+    Args:
+        pool_size: Connections kept per host; match the number of concurrent callers
+        
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=2,
+        read=0,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=False,  # A server-chosen wait could stall shutdown
+        raise_on_status=False  # Hand the last response to the caller's status check
+    )
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+    })
+    return session
+
+
 class BrentOilMonitor:
     """Monitor Brent crude oil prices"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, session: Optional[requests.Session] = None):
         self.api_key = api_key or os.getenv('COMMODITIES_API_KEY', '')
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+        self.session = session or create_session()
     
     def get_current_price(self) -> Optional[Dict]:
         """
@@ -112,11 +145,8 @@ class BrentOilMonitor:
 class ShanghaiSteelMonitor:
     """Monitor Shanghai Futures HRC (Hot Rolled Coil) steel prices"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+    def __init__(self, session: Optional[requests.Session] = None):
+        self.session = session or create_session()
     
     def get_current_price(self) -> Optional[Dict]:
         """
@@ -189,11 +219,8 @@ class ShanghaiSteelMonitor:
 class VNStockFundamentalScraper:
     """Scrape Vietnamese stock fundamental data (P/E, revenue growth)"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+    def __init__(self, session: Optional[requests.Session] = None):
+        self.session = session or create_session()
     
     def get_fundamentals(self, symbol: str) -> Optional[Dict]:
         """
@@ -289,11 +316,8 @@ class VNStockFundamentalScraper:
 class VNNewsScanner:
     """Scan Vietnamese business news for specific keywords"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+    def __init__(self, session: Optional[requests.Session] = None):
+        self.session = session or create_session()
     
     def scan_for_keywords(self, symbol: str, keywords: List[str], days: int = 7) -> Optional[Dict]:
         """
@@ -350,10 +374,15 @@ class VNNewsScanner:
         try:
             # CafeF business RSS feed
             feed_url = "https://cafef.vn/timeline.rss"
-            feed = feedparser.parse(feed_url)
+            response = self.session.get(feed_url, timeout=10)
+            feed = feedparser.parse(response.content)
             
             cutoff_date = datetime.now() - timedelta(days=days)
             
+            # Lowercase the search terms once per feed, not per article
+            symbol_lower = symbol.lower()
+            keywords_lower = [(keyword, keyword.lower()) for keyword in keywords]
+            
             for entry in feed.entries:
                 # Check if article is recent
                 published = entry.get('published_parsed')
@@ -365,13 +394,12 @@ class VNNewsScanner:
                 # Check for keywords in title or summary
                 title = entry.get('title', '').lower()
                 summary = entry.get('summary', '').lower()
-                symbol_lower = symbol.lower()
                 
                 # Check if symbol or keywords are mentioned
                 matched_keywords = []
                 if symbol_lower in title or symbol_lower in summary:
-                    for keyword in keywords:
-                        if keyword.lower() in title or keyword.lower() in summary:
+                    for keyword, keyword_lower in keywords_lower:
+                        if keyword_lower in title or keyword_lower in summary:
                             matched_keywords.append(keyword)
                 
                 if matched_keywords:
@@ -394,10 +422,15 @@ class VNNewsScanner:
         try:
             # VnExpress business RSS feed
             feed_url = "https://vnexpress.net/rss/kinh-doanh.rss"
-            feed = feedparser.parse(feed_url)
+            response = self.session.get(feed_url, timeout=10)
+            feed = feedparser.parse(response.content)
             
             cutoff_date = datetime.now() - timedelta(days=days)
             
+            # Lowercase the search terms once per feed, not per article
+            symbol_lower = symbol.lower()
+            keywords_lower = [(keyword, keyword.lower()) for keyword in keywords]
+            
             for entry in feed.entries:
                 # Check if article is recent
                 published = entry.get('published_parsed')
@@ -409,13 +442,12 @@ class VNNewsScanner:
                 # Check for keywords in title or description
                 title = entry.get('title', '').lower()
                 description = entry.get('description', '').lower()
-                symbol_lower = symbol.lower()
                 
                 # Check if symbol or keywords are mentioned  
                 matched_keywords = []
                 if symbol_lower in title or symbol_lower in description:
-                    for keyword in keywords:
-                        if keyword.lower() in title or keyword.lower() in description:
+                    for keyword, keyword_lower in keywords_lower:
+                        if keyword_lower in title or keyword_lower in description:
                             matched_keywords.append(keyword)
                 
                 if matched_keywords:
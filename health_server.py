@@ -4,18 +4,58 @@ Prevents free tier from sleeping by providing HTTP endpoint
 """
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from threading import Thread
+from typing import Optional
 import os
+import time
 
 class HealthHandler(BaseHTTPRequestHandler):
     """Simple HTTP handler for health checks"""
     
+    # Health payload is static, so a fixed ETag lets probers revalidate cheaply
+    HEALTH_BODY = b'OK - Stock Trading Bot is running'
+    HEALTH_ETAG = '"health-v1"'
+    HEALTH_CACHE_CONTROL = 'public, max-age=30'
+    
+    # Serve the last good response for this long if a live check fails
+    FALLBACK_TTL = 60  # seconds
+    _last_ok_response: Optional[bytes] = None
+    _last_ok_ts: float = 0.0
+    
+    def check_health(self) -> bytes:
+        """
+        Run the live health check
+        
+        Returns:
+            Response body; raises if the bot is unhealthy
+        """
+        return self.HEALTH_BODY
+    
     def do_GET(self):
         """Handle GET requests"""
         if self.path == '/health':
+            try:
+                body = self.check_health()
+            except Exception:
+                self._send_health_fallback()
+                return
+            
+            # Cache on the class so every handler instance shares it
+            HealthHandler._last_ok_response = body
+            HealthHandler._last_ok_ts = time.monotonic()
+            
+            if self.headers.get('If-None-Match') == self.HEALTH_ETAG:
+                self.send_response(304)
+                self.send_header('ETag', self.HEALTH_ETAG)
+                self.send_header('Cache-Control', self.HEALTH_CACHE_CONTROL)
+                self.end_headers()
+                return
+            
             self.send_response(200)
             self.send_header('Content-type', 'text/plain')
+            self.send_header('ETag', self.HEALTH_ETAG)
+            self.send_header('Cache-Control', self.HEALTH_CACHE_CONTROL)
             self.end_headers()
-            self.wfile.write(b'OK - Stock Trading Bot is running')
+            self.wfile.write(body)
         elif self.path == '/':
             self.send_response(200)
             self.send_header('Content-type', 'text/html')
@@ -34,6 +74,23 @@ class HealthHandler(BaseHTTPRequestHandler):
             self.send_response(404)
             self.end_headers()
     
+    def _send_health_fallback(self):
+        """Serve the cached health response if fresh, otherwise 503"""
+        cached = HealthHandler._last_ok_response
+        age = time.monotonic() - HealthHandler._last_ok_ts
+        
+        if cached is not None and age < self.FALLBACK_TTL:
+            self.send_response(200)
+            self.send_header('Content-type', 'text/plain')
+            self.send_header('X-Cache-Status', 'stale')
+            self.end_headers()
+            self.wfile.write(cached)
+        else:
+            self.send_response(503)
+            self.send_header('Content-type', 'text/plain')
+            self.end_headers()
+            self.wfile.write(b'UNAVAILABLE - Health check failed')
+    
     def log_message(self, format, *args):
         """Suppress access logs"""
         pass
@@ -21,11 +21,21 @@ PING_INTERVAL = 300  # 5 minutes in seconds
 MAX_RETRIES = 3
 TIMEOUT = 10  # seconds
 
+# Shared session keeps the TCP/TLS connection alive between pings
+_session = None
+
+def get_session():
+    """Get the shared HTTP session, creating it on first use"""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    return _session
+
 def ping_health_endpoint():
     """Ping the health endpoint once"""
     try:
         logger.info(f"Pinging {HEALTH_URL}...")
-        response = requests.get(HEALTH_URL, timeout=TIMEOUT)
+        response = get_session().get(HEALTH_URL, timeout=TIMEOUT)
         
         if response.status_code == 200:
             logger.info(f"✅ Health check successful: {response.text[:100]}")
@@ -88,6 +98,9 @@ def run_continuous_pinger():
         logger.info(f"Final stats: {success_count}/{ping_count} successful")
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
+    finally:
+        if _session is not None:
+            _session.close()
 
 if __name__ == "__main__":
     run_continuous_pinger()
@@ -6,13 +6,10 @@ import sys
 import argparse
 from typing import List
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from config import Config
-from data_scraper import StockDataScraper
-from analyzer import Agent3Analyzer
-from report_generator import ReportGenerator
 from telegram_notifier import TelegramNotifier
-from scheduler import AnalysisScheduler
 from utils.logger import logger
 
 def run_analysis():
@@ -24,6 +21,11 @@ def run_analysis():
     4. Send to Telegram
     """
     try:
+        # Heavy modules are only needed here, keep --test/--help startup light
+        from data_scraper import StockDataScraper
+        from analyzer import Agent3Analyzer
+        from report_generator import ReportGenerator
+        
         logger.info("=" * 60)
         logger.info("Starting Stock Analysis Workflow")
         logger.info(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -39,10 +41,14 @@ def run_analysis():
         symbols = Config.STOCK_SYMBOLS
         logger.info(f"Analyzing {len(symbols)} stocks: {', '.join(symbols)}")
         
-        # Collect data for all stocks
+        # Collect data for all stocks (network-bound, so fetch concurrently)
+        with ThreadPoolExecutor(max_workers=min(16, len(symbols) or 1)) as executor:
+            fetched = dict(zip(symbols, executor.map(scraper.get_stock_data, symbols)))
+        
+        # Keep results in configured symbol order
         all_data = []
         for symbol in symbols:
-            data = scraper.get_stock_data(symbol)
+            data = fetched[symbol]
             if data:
                 all_data.append(data)
             else:
@@ -55,7 +61,7 @@ def run_analysis():
                     'volume': 0
                 })
         
-        # Analyze all stocks
+        # Analyze all stocks (CPU-only and stateful per symbol, keep serial)
         analyses = []
         for data in all_data:
             analysis = analyzer.analyze(data['symbol'], data)
@@ -131,6 +137,7 @@ def main():
         else:
             # Scheduled mode
             logger.info("Running in scheduled mode")
+            from scheduler import AnalysisScheduler
             scheduler = AnalysisScheduler(run_analysis)
             scheduler.start()
             
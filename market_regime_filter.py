@@ -27,17 +27,29 @@ class RegimeAnalysis:
 class MarketRegimeFilter:
     """Filters trading based on market regime"""
     
+    __slots__ = ('price_history', 'volume_history', '_ma_sum', '_vol_sum', '_vol_count')
+    
+    # Thresholds (shared by all filters, never changed per instance)
+    ma_periods = {'MA20': 20, 'MA50': 50}
+    volume_threshold_multiplier = 1.0  # Volume should be >= average
+    sideways_range_pct = 0.05  # 5% range = sideways
+    volatility_shock_pct = 0.10  # 10% move in single update = shock
+    
+    # History window and period tracked by the running volume sums
+    max_history = 60  # MA50 + buffer
+    trim_slack = 20  # Extra points allowed before trimming and re-seeding the sums
+    volume_period = 20
+    
     def __init__(self):
         """Initialize market regime filter"""
         # Historical data cache for MA calculation
         self.price_history: Dict[str, List[float]] = {}
         self.volume_history: Dict[str, List[float]] = {}
         
-        # Thresholds
-        self.ma_periods = {'MA20': 20, 'MA50': 50}
-        self.volume_threshold_multiplier = 1.0  # Volume should be >= average
-        self.sideways_range_pct = 0.05  # 5% range = sideways
-        self.volatility_shock_pct = 0.10  # 10% move in single update = shock
+        # Running window sums, updated in O(1) per new data point
+        self._ma_sum: Dict[str, Dict[int, float]] = {}  # {symbol: {period: sum}}
+        self._vol_sum: Dict[str, float] = {}  # Sum of non-zero volumes in window
+        self._vol_count: Dict[str, int] = {}  # Count of non-zero volumes in window
     
     def analyze_regime(self, symbol: str, data: Dict) -> RegimeAnalysis:
         """
@@ -164,21 +176,49 @@ class MarketRegimeFilter:
         )
     
     def _update_history(self, symbol: str, price: float, volume: float):
-        """Update price and volume history"""
+        """Update price and volume history along with running window sums"""
         if symbol not in self.price_history:
             self.price_history[symbol] = []
+            self._ma_sum[symbol] = {period: 0.0 for period in self.ma_periods.values()}
         if symbol not in self.volume_history:
             self.volume_history[symbol] = []
+            self._vol_sum[symbol] = 0.0
+            self._vol_count[symbol] = 0
         
-        self.price_history[symbol].append(price)
-        self.volume_history[symbol].append(volume)
-        
-        # Keep last 60 data points (for MA50 + buffer)
-        max_length = 60
-        if len(self.price_history[symbol]) > max_length:
-            self.price_history[symbol] = self.price_history[symbol][-max_length:]
-        if len(self.volume_history[symbol]) > max_length:
-            self.volume_history[symbol] = self.volume_history[symbol][-max_length:]
+        prices = self.price_history[symbol]
+        volumes = self.volume_history[symbol]
+        prices.append(price)
+        volumes.append(volume)
+        
+        # Slide each MA window: add the new price, drop the one leaving it
+        ma_sums = self._ma_sum[symbol]
+        for period in ma_sums:
+            ma_sums[period] += price
+            if len(prices) > period:
+                ma_sums[period] -= prices[-period - 1]
+        
+        # Same for the non-zero volume window
+        if volume > 0:
+            self._vol_sum[symbol] += volume
+            self._vol_count[symbol] += 1
+        if len(volumes) > self.volume_period:
+            old_volume = volumes[-self.volume_period - 1]
+            if old_volume > 0:
+                self._vol_sum[symbol] -= old_volume
+                self._vol_count[symbol] -= 1
+        
+        # Keep last 60 data points (for MA50 + buffer). Trim in batches and
+        # re-seed the running sums from the window each time, so float error
+        # from the add/subtract steps never builds up
+        if len(prices) > self.max_history + self.trim_slack:
+            del prices[:-self.max_history]
+            for period in ma_sums:
+                ma_sums[period] = sum(prices[-period:])
+        if len(volumes) > self.max_history + self.trim_slack:
+            del volumes[:-self.max_history]
+            valid_volumes = [v for v in volumes[-self.volume_period:] if v > 0]
+            self._vol_sum[symbol] = sum(valid_volumes)
+            self._vol_count[symbol] = len(valid_volumes)
     
     def _calculate_ma(self, symbol: str, period: int) -> Optional[float]:
         """Calculate moving average"""
@@ -189,6 +229,10 @@ class MarketRegimeFilter:
         if len(prices) < period:
             return None
         
+        running_sum = self._ma_sum[symbol].get(period)
+        if running_sum is not None:
+            return running_sum / period
+        
         return sum(prices[-period:]) / period
     
     def _calculate_ma_slope(self, symbol: str, period: int) -> Optional[float]:
@@ -218,6 +262,10 @@ class MarketRegimeFilter:
         if len(volumes) < period:
             return None
         
+        if period == self.volume_period:
+            count = self._vol_count[symbol]
+            return self._vol_sum[symbol] / count if count else None
+        
         # Filter out zero volumes
         valid_volumes = [v for v in volumes[-period:] if v > 0]
         if not valid_volumes:
@@ -237,7 +285,7 @@ class MarketRegimeFilter:
         recent_prices = prices[-period:]
         price_high = max(recent_prices)
         price_low = min(recent_prices)
-        price_avg = sum(recent_prices) / len(recent_prices)
+        price_avg = self._calculate_ma(symbol, period)
         
         if price_avg == 0:
             return None
@@ -3,12 +3,76 @@ Notification Controller
 Smart notification management to reduce Telegram spam
 Only sends critical alerts immediately, batches less important messages
 """
-from typing import Dict, List, Optional
+import io
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
+from functools import lru_cache
 from dataclasses import dataclass, field
 from utils.logger import logger
 
+# Message templates, parsed once at import instead of per message
+_TRADE_ALERT_TEMPLATE = """{action_emoji} *{symbol}*
+
+*Price:* {price:,.0f} VND
+*Shares:* {shares}
+*Value:* {total:,.0f} VND
+
+*Strategy:* {strategy}
+"""
+_TRADE_PNL_TEMPLATE = "{emoji} *P&L:* {pnl:+,.0f} VND ({pnl_percentage:+.2f}%)\n"
+_POSITION_UPDATE_TEMPLATE = "{emoji} {symbol}: {price:,.0f} VND ({pnl:+,.0f}, {pnl_pct:+.1f}%)"
+_MARKET_UPDATE_TEMPLATE = "{emoji} {symbol}: {price:,.0f} VND ({change_pct:+.2f}%)"
+_STARTUP_TEMPLATE = """🤖 *AUTO TRADING BOT STARTED*
+
+*Mode:* {mode}
+*Capital:* {capital:,.0f} VND
+*Symbols:* {symbols}
+
+⏰ """
+# Digest headers are filled from the performance report dict
+_HOURLY_HEADER_TEMPLATE = """📊 *BÁO CÁO THEO GIỜ*
+
+💰 *Danh mục:* {current_value:,.0f} VND
+📈 *P&L:* {total_pnl:+,.0f} VND ({total_return_pct:+.2f}%)
+💵 *Tiền mặt:* {cash:,.0f} VND
+
+*Vị thế:* {num_positions}
+*Giao dịch hôm nay:* {trades_today}
+"""
+_DAILY_HEADER_TEMPLATE = """📈 *BÁO CÁO CUỐI NGÀY* - {date}
+
+💰 *Kết quả:*
+• Giá trị danh mục: {current_value:,.0f} VND
+• P&L hôm nay: {total_pnl:+,.0f} VND ({total_return_pct:+.2f}%)
+• Tiền mặt: {cash:,.0f} VND
+
+📊 *Hoạt động:*
+• Vị thế mở: {num_positions}
+• Giao dịch: {trades_today}
+
+"""
+
+# Emoji pairs indexed by int(condition): (False, True)
+ACTION_EMOJI = ("🔴 SELL", "🟢 BUY")   # is BUY
+PNL_EMOJI = ("❤️", "💚")               # pnl > 0
+POSITION_EMOJI = ("📉", "📈")          # pnl >= 0
+CHANGE_EMOJI = ("🔽", "🔼")            # change >= 0
+
+@lru_cache(maxsize=8)
+def _startup_body(paper_mode: bool, capital: float, symbols: Tuple[str, ...]) -> str:
+    """Startup message up to the timestamp; config is static, so rendered once"""
+    return _STARTUP_TEMPLATE.format(
+        mode="PAPER TRADING" if paper_mode else "⚠️ LIVE TRADING",
+        capital=capital,
+        symbols=', '.join(symbols)
+    )
+
 class NotificationLevel(Enum):
     """Notification priority levels"""
     CRITICAL = 1  # Send immediately
@@ -23,6 +87,7 @@ class Notification:
     timestamp: datetime = field(default_factory=datetime.now)
     category: str = "general"
     data: Dict = field(default_factory=dict)
+    mono_ts: float = field(default_factory=time.monotonic)  # For dedup window
 
 class NotificationController:
     """Controls notification flow to reduce spam"""
@@ -36,9 +101,14 @@ class NotificationController:
         """
         self.notifier = telegram_notifier
         
-        # Message queues
-        self.important_queue: List[Notification] = []
-        self.info_queue: List[Notification] = []
+        # Message queues (bounded: oldest entries drop if digests stall)
+        self.important_queue: Deque[Notification] = deque(maxlen=500)
+        self.info_queue: Deque[Notification] = deque(maxlen=2000)
+        self._dropped_important = 0
+        self._dropped_info = 0
+        
+        # Latest per-symbol position/market update; repeats overwrite older ones
+        self._latest: Dict[Tuple[str, str], Notification] = {}
         
         # Tracking
         self.last_hourly_digest = None
@@ -47,6 +117,16 @@ class NotificationController:
         
         # Deduplication window
         self.dedup_window_seconds = 300  # 5 minutes
+        self._cache_lock = threading.Lock()  # Cache is shared with the alert worker
+        
+        # Trade alerts are sent by a background worker so trading never
+        # waits on Telegram; started on first use
+        self._alert_queue: "queue.Queue[Optional[Notification]]" = queue.Queue()
+        self._alert_thread: Optional[threading.Thread] = None
+        self._alert_lock = threading.Lock()  # Guards starting/stopping the worker
+        self.alert_coalesce_seconds = 0.5  # Alerts this close together go out as one message
+        self._holding_alerts = False  # Inside batch_alerts(): collect instead of queueing
+        self._held_alerts: List[Notification] = []
     
     def notify(self, message: str, level: NotificationLevel = NotificationLevel.INFO, 
                category: str = "general", data: Dict = None) -> bool:
@@ -71,7 +151,7 @@ class NotificationController:
         
         # Check for duplicates
         if self._is_duplicate(notification):
-            logger.debug(f"Skipping duplicate notification: {message[:50]}")
+            logger.debug("Skipping duplicate notification: %.50s", message)
             return False
         
         if level == NotificationLevel.CRITICAL:
@@ -83,49 +163,49 @@ class NotificationController:
         
         elif level == NotificationLevel.IMPORTANT:
             # Queue for hourly digest
+            if len(self.important_queue) == self.important_queue.maxlen:
+                self._dropped_important += 1
             self.important_queue.append(notification)
-            logger.debug(f"Queued IMPORTANT notification: {message[:50]}")
+            logger.debug("Queued IMPORTANT notification: %.50s", message)
             return False
         
         else:  # INFO
             # Queue for daily digest
+            if len(self.info_queue) == self.info_queue.maxlen:
+                self._dropped_info += 1
             self.info_queue.append(notification)
-            logger.debug(f"Queued INFO notification: {message[:50]}")
+            logger.debug("Queued INFO notification: %.50s", message)
             return False
     
     def send_startup_message(self, config) -> bool:
         """Send bot startup notification (CRITICAL)"""
-        mode = "PAPER TRADING" if config.PAPER_TRADING_MODE else "⚠️ LIVE TRADING"
-        
-        msg = f"""🤖 *AUTO TRADING BOT STARTED*
-
-*Mode:* {mode}
-*Capital:* {config.INITIAL_CAPITAL:,.0f} VND
-*Symbols:* {', '.join(config.TRADING_SYMBOLS)}
-
-⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-"""
+        msg = _startup_body(
+            config.PAPER_TRADING_MODE,
+            config.INITIAL_CAPITAL,
+            tuple(config.TRADING_SYMBOLS)
+        ) + datetime.now().strftime('%Y-%m-%d %H:%M:%S') + "\n"
         
         return self.notify(msg, NotificationLevel.CRITICAL, "system")
     
     def send_trade_alert(self, trade: Dict) -> bool:
         """Send trade execution alert (CRITICAL)"""
-        action_emoji = "🟢 BUY" if trade['action'] == 'BUY' else "🔴 SELL"
-        
-        msg = f"""{action_emoji} *{trade['symbol']}*
-
-*Price:* {trade['price']:,.0f} VND
-*Shares:* {trade['shares']}
-*Value:* {trade['total']:,.0f} VND
-
-*Strategy:* {trade.get('strategy', 'N/A')}
-"""
+        msg = _TRADE_ALERT_TEMPLATE.format(
+            action_emoji=ACTION_EMOJI[trade['action'] == 'BUY'],
+            symbol=trade['symbol'],
+            price=trade['price'],
+            shares=trade['shares'],
+            total=trade['total'],
+            strategy=trade.get('strategy', 'N/A')
+        )
         
         if trade['action'] == 'SELL' and 'pnl' in trade:
-            pnl_emoji = "💚" if trade['pnl'] > 0 else "❤️"
-            msg += f"{pnl_emoji} *P&L:* {trade['pnl']:+,.0f} VND ({trade['pnl_percentage']:+.2f}%)\n"
+            msg += _TRADE_PNL_TEMPLATE.format(
+                emoji=PNL_EMOJI[trade['pnl'] > 0],
+                pnl=trade['pnl'],
+                pnl_percentage=trade['pnl_percentage']
+            )
         
-        return self.notify(msg, NotificationLevel.CRITICAL, "trade", trade)
+        return self._queue_alert(msg, "trade", trade)
     
     def send_stop_loss_alert(self, symbol: str, price: float, pnl: float) -> bool:
         """Send stop-loss trigger alert (CRITICAL)"""
@@ -138,7 +218,7 @@ class NotificationController:
 Bảo vệ vốn thành công!
 """
         
-        return self.notify(msg, NotificationLevel.CRITICAL, "stop_loss")
+        return self._queue_alert(msg, "stop_loss")
     
     def send_circuit_breaker_alert(self, reason: str) -> bool:
         """Send circuit breaker alert (CRITICAL)"""
@@ -166,42 +246,51 @@ Bot sẽ tự động tiếp tục hoặc dùng `/resume` để bắt đầu l
     def queue_position_update(self, symbol: str, current_price: float, 
                              pnl: float, pnl_pct: float):
         """Queue position update for hourly digest (IMPORTANT)"""
-        pnl_emoji = "📈" if pnl >= 0 else "📉"
-        msg = f"{pnl_emoji} {symbol}: {current_price:,.0f} VND ({pnl:+,.0f}, {pnl_pct:+.1f}%)"
+        msg = _POSITION_UPDATE_TEMPLATE.format(
+            emoji=POSITION_EMOJI[pnl >= 0], symbol=symbol,
+            price=current_price, pnl=pnl, pnl_pct=pnl_pct
+        )
         
-        self.notify(msg, NotificationLevel.IMPORTANT, "position")
+        # Only the latest update per symbol matters for the digest
+        self._latest[("position", symbol)] = Notification(
+            level=NotificationLevel.IMPORTANT, message=msg, category="position"
+        )
     
     def queue_market_update(self, symbol: str, price: float, change_pct: float):
         """Queue market price update (INFO)"""
-        change_emoji = "🔼" if change_pct >= 0 else "🔽"
-        msg = f"{change_emoji} {symbol}: {price:,.0f} VND ({change_pct:+.2f}%)"
+        msg = _MARKET_UPDATE_TEMPLATE.format(
+            emoji=CHANGE_EMOJI[change_pct >= 0], symbol=symbol,
+            price=price, change_pct=change_pct
+        )
         
-        self.notify(msg, NotificationLevel.INFO, "market")
+        # Only the latest update per symbol matters for the digest
+        self._latest[("market", symbol)] = Notification(
+            level=NotificationLevel.INFO, message=msg, category="market"
+        )
     
-    def send_hourly_digest(self, performance: Dict) -> bool:
+    def send_hourly_digest(self, performance: Dict, now: Optional[datetime] = None) -> bool:
         """Send hourly performance digest"""
-        now = datetime.now()
+        now = now or datetime.now()
+        today = now.date()
         
         # Check if we should send (every hour)
-        if self.last_hourly_digest and (now - self.last_hourly_digest).seconds < 3600:
+        if self.last_hourly_digest and (now - self.last_hourly_digest).total_seconds() < 3600:
             return False
         
-        msg = f"""📊 *BÁO CÁO THEO GIỜ*
-
-💰 *Danh mục:* {performance['current_value']:,.0f} VND
-📈 *P&L:* {performance['total_pnl']:+,.0f} VND ({performance['total_return_pct']:+.2f}%)
-💵 *Tiền mặt:* {performance['cash']:,.0f} VND
-
-*Vị thế:* {performance['num_positions']}
-*Giao dịch hôm nay:* {len([t for t in performance['trades'] if t['time'].date() == now.date()])}
-"""
+        parts = [_HOURLY_HEADER_TEMPLATE.format(
+            trades_today=self._count_trades_on(performance, today), **performance
+        )]
         
-        # Add important queued messages
-        if self.important_queue:
-            msg += f"\n📋 *CẬP NHẬT:*\n"
+        # Add important queued messages plus the latest coalesced updates
+        important = list(self.important_queue)
+        important.extend(
+            n for n in self._latest.values() if n.level == NotificationLevel.IMPORTANT
+        )
+        if important:
+            parts.append("\n📋 *CẬP NHẬT:*\n")
             # Group by category
             by_category = {}
-            for notif in self.important_queue:
+            for notif in important:
                 if notif.category not in by_category:
                     by_category[notif.category] = []
                 by_category[notif.category].append(notif.message)
@@ -209,16 +298,22 @@ Bot sẽ tự động tiếp tục hoặc dùng `/resume` để bắt đầu l
             for category, messages in by_category.items():
                 if len(messages) <= 3:
                     for m in messages:
-                        msg += f"• {m}\n"
+                        parts.append(f"• {m}\n")
                 else:
                     # Summarize if too many
-                    msg += f"• {len(messages)} updates trong {category}\n"
+                    parts.append(f"• {len(messages)} updates trong {category}\n")
+        
+        if self._dropped_important:
+            parts.append(f"• {self._dropped_important} updates cũ đã bị lược bỏ\n")
         
-        msg += f"\n⏰ {now.strftime('%H:%M')}"
+        parts.append(f"\n⏰ {now.strftime('%H:%M')}")
+        msg = "".join(parts)
         
         success = self.notifier.send_message(msg)
         if success:
             self.important_queue.clear()
+            self._dropped_important = 0
+            self._clear_latest(NotificationLevel.IMPORTANT)
             self.last_hourly_digest = now
         
         return success
@@ -226,48 +321,207 @@ Bot sẽ tự động tiếp tục hoặc dùng `/resume` để bắt đầu l
     def send_daily_digest(self, performance: Dict, journal_summary: str) -> bool:
         """Send end-of-day full report"""
         now = datetime.now()
+        today = now.date()
         
-        msg = f"""📈 *BÁO CÁO CUỐI NGÀY* - {now.strftime('%Y-%m-%d')}
-
-💰 *Kết quả:*
-• Giá trị danh mục: {performance['current_value']:,.0f} VND
-• P&L hôm nay: {performance['total_pnl']:+,.0f} VND ({performance['total_return_pct']:+.2f}%)
-• Tiền mặt: {performance['cash']:,.0f} VND
-
-📊 *Hoạt động:*
-• Vị thế mở: {performance['num_positions']}
-• Giao dịch: {len([t for t in performance['trades'] if t['time'].date() == now.date()])}
-
-{journal_summary}
-
-Chúc ngủ ngon! 🌙
-"""
+        buf = io.StringIO()
+        buf.write(_DAILY_HEADER_TEMPLATE.format(
+            date=now.strftime('%Y-%m-%d'),
+            trades_today=self._count_trades_on(performance, today),
+            **performance
+        ))
+        if self._dropped_info:
+            buf.write(f"• {self._dropped_info} updates cũ đã bị lược bỏ\n\n")
+        buf.write(journal_summary)
+        buf.write("\n\nChúc ngủ ngon! 🌙\n")
+        msg = buf.getvalue()
         
         success = self.notifier.send_long_message(msg)
         if success:
             self.info_queue.clear()
+            self._dropped_info = 0
+            self._clear_latest(NotificationLevel.INFO)
             self.last_daily_digest = now
         
         return success
     
-    def _is_duplicate(self, notification: Notification) -> bool:
-        """Check if notification is duplicate within time window"""
-        now = datetime.now()
+    def _count_trades_on(self, performance: Dict, day) -> int:
+        """Count trades made on a given date, using the trade log's running count if available"""
+        trades = performance['trades']
+        count_on = getattr(trades, 'count_on', None)
+        if count_on is not None:
+            return count_on(day)
+        return sum(1 for t in trades if t['time'].date() == day)
+    
+    def _queue_alert(self, message: str, category: str, data: Dict = None) -> bool:
+        """
+        Hand a CRITICAL alert to the background sender
         
-        # Clean old cache
-        self.sent_messages_cache = [
-            n for n in self.sent_messages_cache 
-            if (now - n.timestamp).seconds < self.dedup_window_seconds
-        ]
+        Returns:
+            True if queued (False if it was a duplicate)
+        """
+        notification = Notification(
+            level=NotificationLevel.CRITICAL,
+            message=message,
+            category=category,
+            data=data or {}
+        )
         
-        # Check for duplicates
-        for cached in self.sent_messages_cache:
-            if (cached.category == notification.category and 
-                cached.message == notification.message):
-                return True
+        # Claim the cache entry now, not after the send, so an identical
+        # alert raised while this one is still queued is caught
+        if self._is_duplicate(notification, record=True):
+            logger.debug("Skipping duplicate notification: %.50s", message)
+            return False
+        
+        if self._holding_alerts:
+            self._held_alerts.append(notification)
+            return True
+        
+        self._enqueue_alert(notification)
+        return True
+    
+    def _enqueue_alert(self, notification: Notification):
+        """Put an alert on the sender queue, starting the worker if needed"""
+        with self._alert_lock:
+            thread = self._alert_thread
+            if thread is None or not thread.is_alive():
+                self._alert_thread = threading.Thread(
+                    target=self._alert_worker, name="alert-sender", daemon=True
+                )
+                self._alert_thread.start()
+            
+            self._alert_queue.put(notification)
+    
+    def _stop_alert_worker(self) -> bool:
+        """
+        Decide whether the worker may exit after reading a stop sentinel
+        
+        Returns:
+            False if alerts were queued behind the sentinel (keep sending them),
+            True once the worker has been unregistered so the next alert starts a new one
+        """
+        with self._alert_lock:
+            if not self._alert_queue.empty():
+                return False
+            if self._alert_thread is threading.current_thread():
+                self._alert_thread = None
+            return True
+    
+    @contextmanager
+    def batch_alerts(self):
+        """
+        Hold trade/stop-loss alerts raised inside the block
+        
+        On exit they are queued back-to-back, so the sender coalesces them
+        into a single Telegram message (e.g. one per trading iteration).
+        """
+        self._holding_alerts = True
+        try:
+            yield
+        finally:
+            self._holding_alerts = False
+            held, self._held_alerts = self._held_alerts, []
+            for notification in held:
+                self._enqueue_alert(notification)
+    
+    def _alert_worker(self):
+        """Send queued alerts, coalescing bursts into one message"""
+        while True:
+            first = self._alert_queue.get()
+            if first is None:
+                if self._stop_alert_worker():
+                    return
+                continue
+            
+            # Collect whatever else arrives within the coalescing window
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.alert_coalesce_seconds
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    notification = self._alert_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if notification is None:
+                    stop = True
+                    break
+                batch.append(notification)
+            
+            msg = "\n\n".join(n.message for n in batch)
+            try:
+                success = self.notifier.send_long_message(msg)
+            except Exception as e:
+                logger.error(f"Error sending queued alerts: {e}")
+                success = False
+            if not success:
+                self._remove_from_cache(batch)  # Let a retry of these alerts through
+            
+            if stop and self._stop_alert_worker():
+                return
+    
+    def flush_alerts(self, timeout: float = 10.0):
+        """
+        Send any queued alerts and stop the worker (restarted on next alert)
+        
+        Args:
+            timeout: Max seconds to wait for pending sends
+        """
+        thread = self._alert_thread
+        if thread is None:
+            return
+        self._alert_queue.put(None)
+        thread.join(timeout)
+        if thread.is_alive():
+            # It still exits on the sentinel once the send finishes, or keeps
+            # going if newer alerts are queued behind it
+            logger.warning(f"Alert sender still busy after {timeout}s, not waiting further")
+    
+    def _clear_latest(self, level: NotificationLevel):
+        """Drop coalesced updates of a level once they have been sent"""
+        self._latest = {
+            key: n for key, n in self._latest.items() if n.level != level
+        }
+    
+    def _is_duplicate(self, notification: Notification, record: bool = False) -> bool:
+        """
+        Check if notification is duplicate within time window
+        
+        Args:
+            notification: Notification to check
+            record: Also add it to the cache if it is not a duplicate, in the
+                same locked step as the check
+        """
+        now = time.monotonic()
+        
+        with self._cache_lock:
+            # Clean old cache
+            self.sent_messages_cache = [
+                n for n in self.sent_messages_cache 
+                if now - n.mono_ts < self.dedup_window_seconds
+            ]
+            
+            # Check for duplicates
+            for cached in self.sent_messages_cache:
+                if (cached.category == notification.category and 
+                    cached.message == notification.message):
+                    return True
+            
+            if record:
+                self.sent_messages_cache.append(notification)
         
         return False
     
     def _add_to_cache(self, notification: Notification):
         """Add notification to cache for deduplication"""
-        self.sent_messages_cache.append(notification)
+        with self._cache_lock:
+            self.sent_messages_cache.append(notification)
+    
+    def _remove_from_cache(self, notifications: List[Notification]):
+        """Forget notifications whose send failed"""
+        with self._cache_lock:
+            self.sent_messages_cache = [
+                n for n in self.sent_messages_cache
+                if not any(n is failed for failed in notifications)
+            ]
@@ -3,13 +3,137 @@ Paper Trading Simulator
 Simulates real trading with 10 million VND capital
 Based on 3-Agent bot signals
 """
-from typing import Dict, List, Tuple
-from datetime import datetime
+from array import array
+from collections import deque
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime
 from utils.logger import logger
+from analyzer import (DECISION_BUY, DECISION_ACCUMULATE, DECISION_EXIT,
+                      classify_decision)
+
+# code -> (confidence scale, max allocation of cash, trade reason)
+_ALLOCATION_RULES = {
+    DECISION_BUY: (0.30, 0.25, "Strong buy signal"),
+    DECISION_ACCUMULATE: (0.20, 0.15, "Accumulation signal"),
+}
+
+class TradeLog(Sequence):
+    """
+    Columnar trade history
+    
+    Each field is kept in its own column instead of one dict per trade.
+    Indexing, slicing and iteration still yield the familiar trade dicts,
+    built on access.
+    """
+    
+    ACTIONS = ('BUY', 'SELL')
+    
+    def __init__(self):
+        self.times: List[datetime] = []
+        self.actions = array('B')  # index into ACTIONS
+        self.symbols: List[str] = []
+        self.shares = array('q')
+        self.prices: List[float] = []
+        self.totals: List[float] = []
+        self.pnls: List[Optional[float]] = []  # None for BUY rows
+        self.pnl_percentages: List[Optional[float]] = []
+        self.reasons: List[str] = []
+        
+        # Running count for the most recent trading day seen
+        self._day: Optional[date] = None
+        self._day_count = 0
+    
+    def append(self, time: datetime, action: str, symbol: str, shares: int,
+               price: float, total: float, reason: str,
+               pnl: Optional[float] = None, pnl_percentage: Optional[float] = None):
+        """Record one trade"""
+        self.times.append(time)
+        self.actions.append(self.ACTIONS.index(action))
+        self.symbols.append(symbol)
+        self.shares.append(shares)
+        self.prices.append(price)
+        self.totals.append(total)
+        self.pnls.append(pnl)
+        self.pnl_percentages.append(pnl_percentage)
+        self.reasons.append(reason)
+        
+        day = time.date()
+        if day == self._day:
+            self._day_count += 1
+        elif self._day is None or day > self._day:
+            self._day, self._day_count = day, 1
+    
+    def count_on(self, day: date) -> int:
+        """
+        Count trades made on a given date
+        
+        Args:
+            day: Calendar date
+            
+        Returns:
+            Number of trades; O(1) for the latest trading day
+        """
+        if day == self._day:
+            return self._day_count
+        if self._day is not None and day > self._day:
+            return 0
+        return sum(1 for t in self.times if t.date() == day)
+    
+    def columns(self) -> Dict[str, Sequence]:
+        """
+        Expose the raw columns for bulk analytics
+        
+        Returns:
+            Column name -> live column (not a copy; treat as read-only).
+            'action_code' indexes ACTIONS; 'pnl' and 'pnl_percentage'
+            hold None for BUY rows.
+        """
+        return {
+            'time': self.times,
+            'action_code': self.actions,
+            'symbol': self.symbols,
+            'shares': self.shares,
+            'price': self.prices,
+            'total': self.totals,
+            'pnl': self.pnls,
+            'pnl_percentage': self.pnl_percentages,
+            'reason': self.reasons,
+        }
+    
+    def __len__(self) -> int:
+        return len(self.symbols)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("trade index out of range")
+        return self._row(index)
+    
+    def _row(self, i: int) -> Dict:
+        """Build the trade dict for row i"""
+        trade = {
+            'time': self.times[i],
+            'action': self.ACTIONS[self.actions[i]],
+            'symbol': self.symbols[i],
+            'shares': self.shares[i],
+            'price': self.prices[i],
+            'total': self.totals[i],
+        }
+        if self.pnls[i] is not None:
+            trade['pnl'] = self.pnls[i]
+            trade['pnl_percentage'] = self.pnl_percentages[i]
+        trade['reason'] = self.reasons[i]
+        return trade
 
 class PaperTradingSimulator:
     """Simulates trading with virtual capital"""
     
+    HISTORY_MAXLEN = 2048  # portfolio_value_history snapshots kept
+    
     def __init__(self, initial_capital: float = 10_000_000):
         """
         Initialize simulator
@@ -20,18 +144,20 @@ class PaperTradingSimulator:
         self.initial_capital = initial_capital
         self.cash = initial_capital
         self.positions = {}  # {symbol: {'shares': int, 'avg_price': float}}
-        self.trades = []  # History of all trades
-        self.portfolio_value_history = []
+        self.trades = TradeLog()  # History of all trades
+        # Recent cycle snapshots; oldest drop off once full
+        self.portfolio_value_history = deque(maxlen=self.HISTORY_MAXLEN)
     
     def get_portfolio_value(self, current_prices: Dict[str, float]) -> float:
         """Calculate total portfolio value"""
-        stock_value = sum(
-            pos['shares'] * current_prices.get(symbol, pos['avg_price'])
-            for symbol, pos in self.positions.items()
-        )
+        get_price = current_prices.get
+        stock_value = 0.0
+        for symbol, pos in self.positions.items():
+            stock_value += pos['shares'] * get_price(symbol, pos['avg_price'])
         return self.cash + stock_value
     
-    def buy(self, symbol: str, price: float, amount: float, reason: str = "") -> bool:
+    def buy(self, symbol: str, price: float, amount: float, reason: str = "", *,
+            now: Optional[datetime] = None) -> bool:
         """
         Buy stock
         
@@ -40,6 +166,7 @@ class PaperTradingSimulator:
             price: Current price
             amount: Amount in VND to invest
             reason: Reason for buying
+            now: Trade timestamp (defaults to current time)
             
         Returns:
             True if successful
@@ -77,21 +204,14 @@ class PaperTradingSimulator:
             }
         
         # Record trade
-        trade = {
-            'time': datetime.now(),
-            'action': 'BUY',
-            'symbol': symbol,
-            'shares': shares,
-            'price': price,
-            'total': actual_cost,
-            'reason': reason
-        }
-        self.trades.append(trade)
+        self.trades.append(now or datetime.now(), 'BUY', symbol, shares,
+                           price, actual_cost, reason)
         
         logger.info(f"✅ BUY {shares} {symbol} @ {price:,.0f} = {actual_cost:,.0f} VND. Cash left: {self.cash:,.0f}")
         return True
     
-    def sell(self, symbol: str, price: float, percentage: float = 100, reason: str = "") -> bool:
+    def sell(self, symbol: str, price: float, percentage: float = 100, reason: str = "", *,
+             now: Optional[datetime] = None) -> bool:
         """
         Sell stock
         
@@ -100,6 +220,7 @@ class PaperTradingSimulator:
             price: Current price
             percentage: Percentage of position to sell (0-100)
             reason: Reason for selling
+            now: Trade timestamp (defaults to current time)
             
         Returns:
             True if successful
@@ -127,18 +248,9 @@ class PaperTradingSimulator:
         pnl_percentage = ((price / avg_price) - 1) * 100
         
         # Record trade
-        trade = {
-            'time': datetime.now(),
-            'action': 'SELL',
-            'symbol': symbol,
-            'shares': shares_to_sell,
-            'price': price,
-            'total': proceeds,
-            'pnl': pnl,
-            'pnl_percentage': pnl_percentage,
-            'reason': reason
-        }
-        self.trades.append(trade)
+        self.trades.append(now or datetime.now(), 'SELL', symbol, shares_to_sell,
+                           price, proceeds, reason,
+                           pnl=pnl, pnl_percentage=pnl_percentage)
         
         logger.info(f"✅ SELL {shares_to_sell} {symbol} @ {price:,.0f} = {proceeds:,.0f} VND. "
                    f"P&L: {pnl:+,.0f} ({pnl_percentage:+.2f}%). Cash: {self.cash:,.0f}")
@@ -161,71 +273,76 @@ class PaperTradingSimulator:
         logger.info("EXECUTING TRADING STRATEGY")
         logger.info("=" * 60)
         
+        # One timestamp for every trade in this cycle, prices looked up via a bound get
+        now = datetime.now()
+        get_price = current_prices.get
+        
         for analysis in analyses:
             symbol = analysis['symbol']
             confidence = analysis['confidence']
-            action = analysis['decision']
-            price = current_prices.get(symbol, 0)
+            price = get_price(symbol, 0)
             
             if price == 0:
                 logger.warning(f"No price data for {symbol}, skipping")
                 continue
             
-            # Determine position size based on confidence
-            if '🟢' in action:  # MUA NGAY
-                # Allocate based on confidence (higher confidence = larger position)
-                allocation_pct = min(confidence / 100 * 0.30, 0.25)  # Max 25% of capital
-                position_size = self.cash * allocation_pct
-                
-                if position_size >= price:  # Can afford at least 1 share
-                    self.buy(symbol, price, position_size, 
-                            reason=f"Strong buy signal, confidence {confidence}%")
+            # Use the analyzer's decision code; classify only if it is missing
+            code = analysis.get('decision_code')
+            if code is None:
+                code = classify_decision(analysis['decision'])
             
-            elif '🟡' in action:  # TÍCH LŨY
-                # Smaller position for accumulation
-                allocation_pct = min(confidence / 100 * 0.20, 0.15)  # Max 15%
+            if code in _ALLOCATION_RULES:
+                # Higher confidence = larger position, capped per signal type
+                scale, cap, label = _ALLOCATION_RULES[code]
+                allocation_pct = min(confidence / 100 * scale, cap)
                 position_size = self.cash * allocation_pct
                 
-                if position_size >= price:
+                if position_size >= price:  # Can afford at least 1 share
                     self.buy(symbol, price, position_size,
-                            reason=f"Accumulation signal, confidence {confidence}%")
+                            reason=f"{label}, confidence {confidence}%", now=now)
             
-            elif '🔴' in action or confidence < 40:  # ĐỨNG NGOÀI or low confidence
+            elif code == DECISION_EXIT or confidence < 40:  # ĐỨNG NGOÀI or low confidence
                 # Sell if we have a position
                 if symbol in self.positions:
                     self.sell(symbol, price, 100, 
-                            reason=f"Exit signal, confidence {confidence}%")
+                            reason=f"Exit signal, confidence {confidence}%", now=now)
         
         # Record portfolio value
         total_value = self.get_portfolio_value(current_prices)
         self.portfolio_value_history.append({
-            'time': datetime.now(),
+            'time': now,
             'value': total_value,
             'cash': self.cash,
-            'positions': dict(self.positions)
+            # (symbol, shares) pairs; a shallow dict copy would share the
+            # per-symbol dicts that later trades mutate
+            'positions': tuple((symbol, pos['shares']) for symbol, pos in self.positions.items())
         })
     
     def get_performance_report(self, current_prices: Dict[str, float]) -> Dict:
         """Generate performance report"""
-        total_value = self.get_portfolio_value(current_prices)
-        total_pnl = total_value - self.initial_capital
-        total_return = (total_pnl / self.initial_capital) * 100
-        
-        # Calculate per-position P&L
+        # Value the portfolio and build per-position P&L in a single pass
+        get_price = current_prices.get
+        stock_value = 0.0
         position_pnl = {}
         for symbol, pos in self.positions.items():
-            current_price = current_prices.get(symbol, pos['avg_price'])
-            pnl = (current_price - pos['avg_price']) * pos['shares']
-            pnl_pct = ((current_price / pos['avg_price']) - 1) * 100
+            shares = pos['shares']
+            avg_price = pos['avg_price']
+            current_price = get_price(symbol, avg_price)
+            value = shares * current_price
+            stock_value += value
             position_pnl[symbol] = {
-                'shares': pos['shares'],
-                'avg_price': pos['avg_price'],
+                'shares': shares,
+                'avg_price': avg_price,
                 'current_price': current_price,
-                'value': pos['shares'] * current_price,
-                'pnl': pnl,
-                'pnl_percentage': pnl_pct
+                'value': value,
+                'pnl': (current_price - avg_price) * shares,
+                'pnl_percentage': ((current_price / avg_price) - 1) * 100
             }
         
+        total_value = self.cash + stock_value
+        total_pnl = total_value - self.initial_capital
+        total_return = (total_pnl / self.initial_capital) * 100
+        
         return {
             'initial_capital': self.initial_capital,
             'current_value': total_value,
@@ -235,5 +352,6 @@ class PaperTradingSimulator:
             'num_trades': len(self.trades),
             'num_positions': len(self.positions),
             'positions': position_pnl,
-            'trades': self.trades
+            'trades': self.trades,
+            'trade_columns': self.trades.columns()
         }
@@ -3,11 +3,20 @@ Real-Time Price Monitor
 Continuously monitors stock prices and detects significant changes
 """
 import time
+import logging
+import threading
 from typing import Dict, Optional, List
-from datetime import datetime, time as dt_time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from utils.logger import logger
 from data_scraper import StockDataScraper
 
+_BANNER = "=" * 70
+
+# Trading sessions as minutes since midnight: 9:00-11:30 and 13:00-14:30
+_MORNING_OPEN, _MORNING_CLOSE = 9 * 60, 11 * 60 + 30
+_AFTERNOON_OPEN, _AFTERNOON_CLOSE = 13 * 60, 14 * 60 + 30
+
 class PriceMonitor:
     """Monitors real-time stock prices"""
     
@@ -28,67 +37,84 @@ class PriceMonitor:
         self.previous_prices = {}  # {symbol: price}
         self.price_changes = {}  # {symbol: change_pct}
         self.last_update = None
+        self._stop_event = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None  # Reused across polls
+        self._open_cache = (None, False)  # ((weekday, minute), is_open) of the last check
     
-    def is_market_open(self) -> bool:
-        """Check if market is currently open"""
-        now = datetime.now()
-        current_time = now.time()
-        current_day = now.weekday()  # 0-6 (Monday-Sunday)
-        
-        # Check if it's a trading day (Monday-Friday)
-        if current_day not in [0, 1, 2, 3, 4]:
-            return False
-        
-        # Check market hours
-        morning_start = dt_time(9, 0)
-        morning_end = dt_time(11, 30)
-        afternoon_start = dt_time(13, 0)
-        afternoon_end = dt_time(14, 30)
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the fetch thread pool, creating it on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=min(16, len(self.symbols) or 1),
+                thread_name_prefix="price-fetch"
+            )
+        return self._executor
+    
+    def is_market_open(self, now: Optional[datetime] = None) -> bool:
+        """Check if market is open now (or at the given time)"""
+        return self._is_open_at(now or datetime.now())
+    
+    def _is_open_at(self, now: datetime) -> bool:
+        """Check if the market is open at a given moment"""
+        # The answer only changes per minute; reuse it within the same one
+        key = (now.weekday(), now.hour * 60 + now.minute)
+        if key == self._open_cache[0]:
+            return self._open_cache[1]
+        
+        weekday, minute = key
+        # Trading day (Monday-Friday) within market hours
+        is_open = weekday < 5 and (_MORNING_OPEN <= minute <= _MORNING_CLOSE
+                                   or _AFTERNOON_OPEN <= minute <= _AFTERNOON_CLOSE)
+        self._open_cache = (key, is_open)
+        return is_open
+    
+    def time_until_market_open(self, now: Optional[datetime] = None) -> int:
+        """Calculate seconds until market opens (from now or the given time)"""
+        now = now or datetime.now()
         
-        in_morning_session = morning_start <= current_time <= morning_end
-        in_afternoon_session = afternoon_start <= current_time <= afternoon_end
+        if self._is_open_at(now):
+            return 0
         
-        return in_morning_session or in_afternoon_session
+        return int((self._next_open(now) - now).total_seconds())
     
-    def time_until_market_open(self) -> int:
-        """Calculate seconds until market opens"""
-        now = datetime.now()
-        current_time = now.time()
-        current_day = now.weekday()
-        
-        # If weekend, wait until Monday 9am
-        if current_day >= 5:  # Saturday or Sunday
-            days_until_monday = 7 - current_day
-            hours_until_open = (days_until_monday * 24) + (9 - now.hour)
-            return hours_until_open * 3600
-        
-        # If before morning session
-        if current_time < dt_time(9, 0):
-            seconds = (dt_time(9, 0).hour - now.hour) * 3600
-            seconds -= (now.minute * 60 + now.second)
-            return seconds
-        
-        # If between sessions
-        if dt_time(11, 30) < current_time < dt_time(13, 0):
-            seconds = (13 - now.hour) * 3600
-            seconds -= (now.minute * 60 + now.second)
-            return seconds
-        
-        # If after market close, wait until next day
-        if current_time > dt_time(14, 30):
-            next_day_seconds = ((24 - now.hour) + 9) * 3600
-            next_day_seconds -= (now.minute * 60 + now.second)
-            return next_day_seconds
-        
-        return 0
+    def _next_open(self, now: datetime) -> datetime:
+        """
+        Find the next session open after a given moment
+        
+        Args:
+            now: Reference time
+            
+        Returns:
+            Start of the next morning or afternoon session on a trading day
+        """
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        morning_open = midnight + timedelta(minutes=_MORNING_OPEN)
+        
+        # Later session today, if any
+        if now.weekday() < 5:
+            afternoon_open = midnight + timedelta(minutes=_AFTERNOON_OPEN)
+            candidates = [t for t in (morning_open, afternoon_open) if t > now]
+            if candidates:
+                return min(candidates)
+        
+        # Otherwise next trading day's morning (Fri/Sat roll over to Monday)
+        days_ahead = {4: 3, 5: 2}.get(now.weekday(), 1)
+        return morning_open + timedelta(days=days_ahead)
     
     def fetch_current_prices(self) -> Dict[str, float]:
         """Fetch current prices for all symbols"""
         prices = {}
         
-        for symbol in self.symbols:
+        # Requests are I/O bound, so issue them together and collect in order
+        executor = self._get_executor()
+        futures = [
+            (symbol, executor.submit(self.scraper.get_stock_data, symbol))
+            for symbol in self.symbols
+        ]
+        
+        for symbol, future in futures:
             try:
-                data = self.scraper.get_stock_data(symbol)
+                data = future.result()
                 if data and data.get('price'):
                     prices[symbol] = data['price']
                 else:
@@ -112,19 +138,16 @@ class PriceMonitor:
                 logger.error("Failed to fetch any prices")
                 return False
             
-            # Calculate changes
+            # Calculate changes in one pass with bound lookups
+            get_old = self.current_prices.get
+            changes = self.price_changes
             for symbol, new_price in new_prices.items():
-                old_price = self.current_prices.get(symbol, new_price)
-                
-                if old_price > 0:
-                    change_pct = ((new_price - old_price) / old_price) * 100
-                    self.price_changes[symbol] = change_pct
-                else:
-                    self.price_changes[symbol] = 0
+                old_price = get_old(symbol, new_price)
+                changes[symbol] = ((new_price - old_price) / old_price) * 100 if old_price > 0 else 0
             
-            # Update prices
-            self.previous_prices = self.current_prices.copy()
-            self.current_prices = new_prices
+            # Update prices: the old dict becomes previous, no copy needed
+            # since current_prices is only ever rebound, never mutated
+            self.previous_prices, self.current_prices = self.current_prices, new_prices
             self.last_update = datetime.now()
             
             return True
@@ -135,13 +158,10 @@ class PriceMonitor:
     
     def get_significant_changes(self, threshold_pct: float = 2.0) -> Dict[str, float]:
         """Get stocks with price changes > threshold"""
-        significant = {}
-        
-        for symbol, change in self.price_changes.items():
-            if abs(change) >= threshold_pct:
-                significant[symbol] = change
-        
-        return significant
+        return {
+            symbol: change for symbol, change in self.price_changes.items()
+            if abs(change) >= threshold_pct
+        }
     
     def get_current_prices(self) -> Dict[str, float]:
         """Get current prices"""
@@ -167,47 +187,68 @@ class PriceMonitor:
         Args:
             callback: Function to call on each update
         """
-        logger.info("=" * 70)
+        logger.info(_BANNER)
         logger.info("🔍 Starting Price Monitor")
-        logger.info(f"Symbols: {', '.join(self.symbols)}")
-        logger.info(f"Poll interval: {self.poll_interval}s")
-        logger.info("=" * 70)
+        logger.info("Symbols: %s", ', '.join(self.symbols))
+        logger.info("Poll interval: %ss", self.poll_interval)
+        logger.info(_BANNER)
+        
+        # Poll on a fixed cadence measured from monotonic deadlines, so fetch
+        # and processing time don't accumulate into drift
+        next_deadline = time.monotonic()
         
-        while True:
+        while not self._stop_event.is_set():
             try:
                 if not self.is_market_open():
                     wait_time = self.time_until_market_open()
-                    logger.info(f"Market closed. Waiting {wait_time // 3600}h until open...")
-                    time.sleep(min(wait_time, 3600))  # Check every hour max
+                    logger.info("Market closed. Waiting %dh until open...", wait_time // 3600)
+                    self._stop_event.wait(min(wait_time, 3600))  # Check every hour max
+                    next_deadline = time.monotonic()
                     continue
                 
                 # Update prices
                 success = self.update_prices()
                 
                 if success:
-                    logger.info(f"✅ Prices updated at {self.last_update.strftime('%H:%M:%S')}")
-                    
-                    # Log prices
-                    for symbol, price in self.current_prices.items():
-                        change = self.price_changes.get(symbol, 0)
-                        change_sign = "+" if change >= 0 else ""
-                        logger.info(f"  {symbol}: {price:,.0f} VND ({change_sign}{change:.2f}%)")
+                    # Log prices, skipping the per-symbol formatting when INFO is off
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(f"✅ Prices updated at {self.last_update:%H:%M:%S}")
+                        for symbol, price in self.current_prices.items():
+                            change = self.price_changes.get(symbol, 0)
+                            logger.info(f"  {symbol}: {price:,.0f} VND ({change:+.2f}%)")
                     
                     # Check for significant changes
                     significant = self.get_significant_changes(2.0)
                     if significant:
-                        logger.warning(f"⚡ Significant changes detected: {significant}")
+                        logger.warning("⚡ Significant changes detected: %s", significant)
                     
                     # Call callback if provided
                     if callback:
                         callback(self.current_prices, self.price_changes)
                 
                 # Wait for next poll
-                time.sleep(self.poll_interval)
+                next_deadline += self.poll_interval
+                delay = next_deadline - time.monotonic()
+                if delay < 0:
+                    # Behind schedule: start a fresh cadence instead of catching up
+                    logger.warning("Poll overran interval by %.1fs", -delay)
+                    next_deadline = time.monotonic() + self.poll_interval
+                    delay = self.poll_interval
+                self._stop_event.wait(delay)
                 
             except KeyboardInterrupt:
                 logger.info("Price monitor stopped by user")
                 break
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}", exc_info=True)
-                time.sleep(60)  # Wait 1 minute before retry
+                self._stop_event.wait(60)  # Wait 1 minute before retry
+                next_deadline = time.monotonic()
+    
+    def stop(self):
+        """Ask start_monitoring to exit; interrupts any pending wait"""
+        self._stop_event.set()
+        
+        # Release fetch threads; a later fetch would create a fresh pool
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -2,12 +2,47 @@
 Report Generator Module
 Formats analysis results for Telegram messages
 """
+import io
 from typing import List, Dict
 from datetime import datetime
+from analyzer import DECISION_BUY, DECISION_ACCUMULATE, classify_decision
 
 class ReportGenerator:
     """Generates formatted reports for Telegram"""
     
+    # Summary-table action label, indexed by decision code
+    _ACTION_EMOJI = ('🟢 MUA', '🟡 CHỜ', '⚪ CHỜ', '🔴 OUT')
+    
+    # Fixed report fragments, built once
+    _SEP_EQ = "═" * 40 + "\n"
+    _SEP_DASH = "─" * 40 + "\n"
+    _FOOTER = """\n
+⚠️ *Lưu ý:* Đây là phân tích tham khảo. 
+Luôn DYOR và quản lý rủi ro cẩn thận.
+
+_Powered by Stock Analyzer Bot v1.0_ 🤖"""
+    
+    # Per-stock layout, parsed once; optional sections are pre-built blocks
+    _STOCK_TEMPLATE = (
+        "*📈 {symbol}*\n"
+        "*Quyết định:* {decision}\n"
+        "*Độ tin cậy:* {confidence}/100 {conf_icon}\n"
+        "\n"
+        "{bull_block}{bear_block}{trade_block}"
+        "💡 _{reasoning}_\n"
+    )
+    _TRADE_TEMPLATE = (
+        "*📊 Thông tin giao dịch:*\n"
+        "  • *Entry:* {entry}\n"
+        "  • *Stop Loss:* {stop_loss}\n"
+        "{targets}"
+        "  • *R:R Ratio:* 1:{risk_reward:.1f}\n"
+        "\n"
+    )
+    
+    # Confidence icon indexed by (conf >= 60) + (conf >= 75)
+    _CONF_ICON = ('❄️', '⚠️', '🔥')
+    
     def __init__(self):
         self.max_message_length = 4000  # Telegram limit is 4096
     
@@ -22,95 +57,82 @@ class ReportGenerator:
         Returns:
             Formatted report string
         """
-        report_parts = []
+        buf = io.StringIO()
         
         # Header
-        header = self._generate_header()
-        report_parts.append(header)
+        buf.write(self._generate_header())
         
         # Market context (if provided)
         if market_context:
-            report_parts.append(f"📊 *THỊ TRƯỜNG:* {market_context}\n")
+            buf.write(f"\n📊 *THỊ TRƯỜNG:* {market_context}\n")
         
-        report_parts.append("═" * 40 + "\n")
+        buf.write("\n")
+        buf.write(self._SEP_EQ)
         
         # Individual stock analyses
         for analysis in analyses:
-            stock_report = self._generate_stock_report(analysis)
-            report_parts.append(stock_report)
-            report_parts.append("─" * 40 + "\n")
+            buf.write("\n")
+            self._generate_stock_report(analysis, buf)
+            buf.write("\n")
+            buf.write(self._SEP_DASH)
         
         # Summary table
-        summary = self._generate_summary_table(analyses)
-        report_parts.append(summary)
+        buf.write("\n")
+        buf.write(self._generate_summary_table(analyses))
         
         # Footer
-        footer = self._generate_footer()
-        report_parts.append(footer)
-        
-        full_report = "\n".join(report_parts)
+        buf.write("\n")
+        buf.write(self._FOOTER)
         
         # Check if report exceeds Telegram limit
-        if len(full_report) > self.max_message_length:
-            return self._truncate_report(full_report)
+        if buf.tell() > self.max_message_length:
+            return self._truncate_report(buf.getvalue())
         
-        return full_report
+        return buf.getvalue()
     
     def _generate_header(self) -> str:
         """Generate report header"""
         now = datetime.now()
-        date_str = now.strftime("%d/%m/%Y")
-        time_str = now.strftime("%H:%M")
         
         return f"""🎯 *BÁO CÁO PHÂN TÍCH CỔ PHIẾU*
-📅 Ngày: {date_str} | ⏰ {time_str}
+📅 Ngày: {now.day:02d}/{now.month:02d}/{now.year} | ⏰ {now.hour:02d}:{now.minute:02d}
 🤖 _Phân tích tự động theo phương pháp 3-Agent_
 
 """
     
-    def _generate_stock_report(self, analysis: Dict) -> str:
-        """Generate report for a single stock"""
-        symbol = analysis['symbol']
-        decision = analysis['decision']
+    def _generate_stock_report(self, analysis: Dict, out: io.StringIO) -> None:
+        """Write report for a single stock into out"""
         confidence = analysis['confidence']
         
-        # Main info
-        lines = [
-            f"*📈 {symbol}*",
-            f"*Quyết định:* {decision}",
-            f"*Độ tin cậy:* {confidence}/100 {'🔥' if confidence >= 75 else '⚠️' if confidence >= 60 else '❄️'}",
-            ""
-        ]
-        
-        # Bullish points
-        if analysis['bullish_case']:
-            lines.append("*🐂 Điểm tích cực:*")
-            for point in analysis['bullish_case'][:3]:  # Top 3
-                lines.append(f"  • {point}")
-            lines.append("")
-        
-        # Bearish points
-        if analysis['bearish_case']:
-            lines.append("*🐻 Rủi ro:*")
-            for point in analysis['bearish_case'][:3]:  # Top 3
-                lines.append(f"  • {point}")
-            lines.append("")
-        
         # Trading info (if applicable)
+        trade_block = ""
         if analysis['entry_zone'] != "N/A":
-            lines.append("*📊 Thông tin giao dịch:*")
-            lines.append(f"  • *Entry:* {analysis['entry_zone']}")
-            lines.append(f"  • *Stop Loss:* {analysis['stop_loss']}")
+            targets = ""
             if analysis['targets']:
-                lines.append(f"  • *Targets:* {', '.join(analysis['targets'][:2])}")
-            lines.append(f"  • *R:R Ratio:* 1:{analysis['risk_reward']:.1f}")
-            lines.append("")
-        
-        # Reasoning
-        lines.append(f"💡 _{analysis['reasoning']}_")
-        lines.append("")
-        
-        return "\n".join(lines)
+                targets = f"  • *Targets:* {', '.join(analysis['targets'][:2])}\n"
+            trade_block = self._TRADE_TEMPLATE.format(
+                entry=analysis['entry_zone'],
+                stop_loss=analysis['stop_loss'],
+                targets=targets,
+                risk_reward=analysis['risk_reward']
+            )
+        
+        out.write(self._STOCK_TEMPLATE.format(
+            symbol=analysis['symbol'],
+            decision=analysis['decision'],
+            confidence=confidence,
+            conf_icon=self._CONF_ICON[(confidence >= 60) + (confidence >= 75)],
+            bull_block=self._points_block("*🐂 Điểm tích cực:*\n", analysis['bullish_case']),
+            bear_block=self._points_block("*🐻 Rủi ro:*\n", analysis['bearish_case']),
+            trade_block=trade_block,
+            reasoning=analysis['reasoning']
+        ))
+    
+    def _points_block(self, title: str, points: List[str]) -> str:
+        """Titled bullet list of the top 3 points, or empty if none"""
+        if not points:
+            return ""
+        return title + "".join(f"  • {point}\n" for point in points[:3]) + "\n"
     
     def _generate_summary_table(self, analyses: List[Dict]) -> str:
         """Generate summary comparison table"""
@@ -123,10 +145,17 @@ class ReportGenerator:
         lines.append(f"{'Mã':<6} {'Action':<12} {'Conf':<5} {'R:R':<5}")
         lines.append("-" * 32)
         
-        # Rows
+        # Rows, collecting recommendations in the same pass
+        buy_stocks, watch_stocks = [], []
         for analysis in analyses:
             symbol = analysis['symbol']
-            action_emoji = self._get_action_emoji(analysis['decision'])
+            code = self._decision_code(analysis)
+            if code == DECISION_BUY:
+                buy_stocks.append(symbol)
+            elif code == DECISION_ACCUMULATE:
+                watch_stocks.append(symbol)
+            
+            action_emoji = self._ACTION_EMOJI[code]
             conf = f"{analysis['confidence']}"
             rr = f"1:{analysis['risk_reward']:.1f}" if analysis['risk_reward'] > 0 else "N/A"
             
@@ -136,9 +165,6 @@ class ReportGenerator:
         lines.append("")
         
         # Recommendations
-        buy_stocks = [a['symbol'] for a in analyses if '🟢' in a['decision']]
-        watch_stocks = [a['symbol'] for a in analyses if '🟡' in a['decision']]
-        
         if buy_stocks:
             lines.append(f"✅ *Khuyến nghị MUA:* {', '.join(buy_stocks)}")
         if watch_stocks:
@@ -146,24 +172,16 @@ class ReportGenerator:
         
         return "\n".join(lines)
     
-    def _generate_footer(self) -> str:
-        """Generate report footer"""
-        return """\n
-⚠️ *Lưu ý:* Đây là phân tích tham khảo. 
-Luôn DYOR và quản lý rủi ro cẩn thận.
-
-_Powered by Stock Analyzer Bot v1.0_ 🤖"""
-    
     def _get_action_emoji(self, decision: str) -> str:
         """Extract emoji from decision"""
-        if '🟢' in decision:
-            return '🟢 MUA'
-        elif '🟡' in decision:
-            return '🟡 CHỜ'
-        elif '⚪' in decision:
-            return '⚪ CHỜ'
-        else:
-            return '🔴 OUT'
+        return self._ACTION_EMOJI[classify_decision(decision)]
+    
+    def _decision_code(self, analysis: Dict) -> int:
+        """Decision code from the analyzer, classifying the string if absent"""
+        code = analysis.get('decision_code')
+        if code is None:
+            code = classify_decision(analysis['decision'])
+        return code
     
     def _truncate_report(self, report: str) -> str:
         """Truncate report if too long"""
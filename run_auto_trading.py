@@ -3,9 +3,12 @@ Run Automated Trading Bot
 Main loop for continuous automated trading
 Integrated with 4-Pillar System (Notification, Market Regime, Strategies, Journal)
 """
+import heapq
+import itertools
+import threading
 import time
-from datetime import datetime
-from typing import Dict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
 
 from auto_config import AutoTradingConfig
 from price_monitor import PriceMonitor
@@ -56,6 +59,15 @@ class AutoTradingBot:
         
         # Tracking
         self.iteration_count = 0
+        
+        # Last performance report, keyed by (price update time, trade count)
+        self._performance_cache = None
+        
+        # Event schedule: heap of (epoch_time, seq, callback); seq breaks ties
+        self._events: List[Tuple[float, int, Callable[[], None]]] = []
+        self._event_seq = itertools.count()
+        self._wakeup = threading.Event()  # Set by stop() to cut a wait short
+        self._next_poll = 0.0  # Deadline of the pending poll event
     
     def start(self):
         """Start the bot"""
@@ -68,16 +80,20 @@ class AutoTradingBot:
         self.running = True
         self.notifier.send_startup_message(self.config)
         
+        # Sleep until the next due event instead of waking every poll
+        self._next_poll = time.time()
+        self._schedule(self._next_poll, self._poll_event)
+        self._schedule(self._next_daily_digest_time(), self._daily_digest_event)
+        
         try:
-            while self.running:
-                self.iteration_count += 1
-                logger.info(f"\nCompleted Iteration #{self.iteration_count}")
-                
-                # Main Loop logic
-                self.run_iteration()
-                
-                logger.info(f"💤 Sleeping for {self.config.POLL_INTERVAL}s...")
-                time.sleep(self.config.POLL_INTERVAL)
+            while self.running and self._events:
+                when, _, callback = heapq.heappop(self._events)
+                delay = when - time.time()
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                    if not self.running:
+                        break
+                callback()
                 
         except KeyboardInterrupt:
             logger.info("\n⚠️ Bot stopped by user")
@@ -86,29 +102,86 @@ class AutoTradingBot:
             logger.error(f"❌ Fatal error in trading loop: {e}", exc_info=True)
             self.notifier.notify(f"🚨 *BOT CRASHED*\n\n{str(e)}", NotificationLevel.CRITICAL, "system")
             self.stop()
+    
+    def _schedule(self, when: float, callback: Callable[[], None]):
+        """Queue callback to run at epoch time when"""
+        heapq.heappush(self._events, (when, next(self._event_seq), callback))
+    
+    def _poll_event(self):
+        """Run one trading iteration, then schedule the next poll"""
+        self.iteration_count += 1
+        logger.info("\nCompleted Iteration #%d", self.iteration_count)
+        
+        # Main Loop logic; the iteration's trade alerts go out as one message
+        with self.notifier.batch_alerts():
+            self.run_iteration()
+        
+        # While open, step the previous deadline so iteration time doesn't
+        # stretch the period (an overrun polls immediately, without catch-up
+        # bursts); otherwise wake right at the next open
+        now = time.time()
+        if self.monitor.is_market_open():
+            self._next_poll = max(self._next_poll + self.config.POLL_INTERVAL, now)
+        else:
+            self._next_poll = now + max(self.monitor.time_until_market_open(), 1)
+        
+        logger.info("💤 Sleeping for %.0fs...", self._next_poll - now)
+        self._schedule(self._next_poll, self._poll_event)
+    
+    def _daily_digest_event(self):
+        """Send the end-of-day digest once, then schedule the next one"""
+        if self.monitor.current_prices:
+            performance = self._current_performance()
+            journal_summary = self.safety.journal.export_report()
+            self.notifier.send_daily_digest(performance, journal_summary)
+        
+        self._schedule(self._next_daily_digest_time(), self._daily_digest_event)
+    
+    def _next_daily_digest_time(self) -> float:
+        """Epoch time of the next daily digest: 14:30 on a trading day"""
+        now = datetime.now()
+        at = now.replace(hour=14, minute=30, second=0, microsecond=0)
+        if at <= now:
+            at += timedelta(days=1)
+        while at.weekday() >= 5:  # Skip Saturday/Sunday
+            at += timedelta(days=1)
+        return at.timestamp()
 
+    def _current_performance(self) -> Dict:
+        """
+        Performance report at the monitor's latest prices
+        
+        Recomputed only after a price update or a trade; otherwise the
+        previous report (e.g. from the end of the last iteration) is reused.
+        """
+        key = (self.monitor.last_update, len(self.simulator.trades))
+        if self._performance_cache is None or self._performance_cache[0] != key:
+            report = self.simulator.get_performance_report(self.monitor.current_prices or {})
+            self._performance_cache = (key, report)
+        return self._performance_cache[1]
+    
     def run_iteration(self):
         """Single trading iteration"""
+        # One clock read for the whole iteration
+        now = datetime.now()
+        
         # 1. Check if market is open
-        if not self.monitor.is_market_open():
-            wait_time = self.monitor.time_until_market_open()
+        if not self.monitor.is_market_open(now):
+            wait_time = self.monitor.time_until_market_open(now)
             if wait_time > 1800: # Only log if long wait
-                logger.info(f"Market closed. Waiting {wait_time // 3600}h {(wait_time % 3600) // 60}m...")
+                logger.info("Market closed. Waiting %dh %dm...", wait_time // 3600, (wait_time % 3600) // 60)
             return
         
         # 2. Reset daily tracking
-        current_capital = self.simulator.get_portfolio_value(self.monitor.current_prices or {})
-        self.safety.reset_daily_tracking(current_capital)
+        current_capital = self._current_performance()['current_value']
+        self.safety.reset_daily_tracking(current_capital, now.date())
         
         # 3. Check safety limits & Journal Pause
         if self.safety.is_circuit_breaker_active():
             # Already active, just wait
             return
             
-        if self.safety.check_daily_loss_limit(current_capital):
-            return
-            
-        if self.safety.check_max_drawdown(current_capital, self.config.INITIAL_CAPITAL):
+        if self.safety.check_risk_limits(current_capital, self.config.INITIAL_CAPITAL):
             return
             
         # 4. Update prices
@@ -117,55 +190,54 @@ class AutoTradingBot:
             logger.warning("Failed to update prices, skipping")
             return
             
-        current_prices = self.monitor.get_current_prices()
-        market_data_map = {
-            s: self.monitor.get_price_info(s) or {} for s in self.config.TRADING_SYMBOLS
-        }
+        # Shared views for the rest of the iteration; nothing updates them again
+        # until the next poll and consumers only read them, so no copy is needed
+        current_prices = self.monitor.current_prices
+        price_changes = self.monitor.price_changes
         
         # 5. Check stop-losses (Critical)
         triggered_stops = self.executor.check_and_execute_stop_losses(current_prices)
         if triggered_stops:
-            logger.info(f"Stop losses executed for: {triggered_stops}")
+            logger.info("Stop losses executed for: %s", triggered_stops)
             
         # 6. Update trailing stops
         self.executor.update_trailing_stops(current_prices)
         
-        # 7. Analyze and Trade
-        for symbol in self.config.TRADING_SYMBOLS:
-            if symbol not in current_prices: continue
-            
-            # Prepare data
-            data = {
+        # 7. Analyze and Trade (only symbols that have a price this poll)
+        symbol_data = {
+            symbol: {
                 'price': current_prices[symbol],
-                'change': self.monitor.price_changes.get(symbol, 0),
+                'change': price_changes.get(symbol, 0),
                 'volume': 0 # TODO: Get real volume if available
             }
-            
-            # 3-Agent Analysis (includes Regime Filter)
-            analysis = self.analyzer.analyze(symbol, data)
-            
+            for symbol in self.config.TRADING_SYMBOLS if symbol in current_prices
+        }
+        
+        # 3-Agent Analysis for all symbols in one call (includes Regime Filter)
+        analyses = self.analyzer.analyze_batch(symbol_data)
+        
+        for symbol, analysis in analyses.items():
             # Execute (includes Entry Strategy check)
-            self.executor.execute_signal(analysis, current_prices[symbol], data)
+            self.executor.execute_signal(analysis, current_prices[symbol], symbol_data[symbol])
             
         # 8. Periodic Reporting (Hourly/Daily Digests)
-        performance = self.simulator.get_performance_report(current_prices)
-        
-        # Hourly Digest
-        self.notifier.send_hourly_digest(performance)
+        performance = self._current_performance()
         
-        # Daily Digest (at end of day 14:30)
-        now = datetime.now()
-        if now.hour == 14 and now.minute >= 30:
-             journal_summary = self.safety.journal.export_report()
-             self.notifier.send_daily_digest(performance, journal_summary)
+        # Hourly Digest (daily digest runs as its own 14:30 event)
+        self.notifier.send_hourly_digest(performance, now)
 
     def stop(self):
         """Stop the bot gracefully"""
         self.running = False
+        self._wakeup.set()
+        self.monitor.stop()
+        
+        # Deliver trade alerts still queued before the final report
+        self.notifier.flush_alerts()
         
         # Send final report
         if self.monitor.current_prices:
-            performance = self.simulator.get_performance_report(self.monitor.current_prices)
+            performance = self._current_performance()
             journal_summary = self.safety.journal.export_report()
             self.notifier.send_daily_digest(performance, journal_summary)
         
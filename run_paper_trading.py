@@ -3,6 +3,7 @@ Run Paper Trading Simulation
 Execute trading strategy with real market data and 10M VND capital
 """
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from data_scraper import StockDataScraper
@@ -40,14 +41,14 @@ def run_paper_trading():
         logger.info(f"📊 Trading stocks: {list(REAL_PRICES.keys())}")
         logger.info("")
         
-        # Get market data
+        # Get market data: scrape all symbols concurrently, keyed by symbol
+        # so the batch analyzer can take it as-is
         logger.info("📡 Fetching market data...")
-        all_data = []
+        with ThreadPoolExecutor(max_workers=len(REAL_PRICES)) as pool:
+            scraped = pool.map(scraper.get_stock_data, REAL_PRICES)
         
-        for symbol in REAL_PRICES.keys():
-            # Try to scrape additional data
-            data = scraper.get_stock_data(symbol)
-            
+        data_by_symbol = {}
+        for symbol, data in zip(REAL_PRICES, scraped):
             # Use real prices
             if data:
                 data['price'] = REAL_PRICES[symbol]
@@ -60,18 +61,15 @@ def run_paper_trading():
                     'volume': 0
                 }
             
-            all_data.append(data)
+            data_by_symbol[symbol] = data
             logger.info(f"  ✅ {symbol}: {REAL_PRICES[symbol]:,.0f} VND")
         
         logger.info("")
         
         # Analyze all stocks
         logger.info("🤖 Running 3-Agent Analysis...")
-        analyses = []
-        for data in all_data:
-            analysis = analyzer.analyze(data['symbol'], data)
-            analyses.append(analysis)
-            
+        analyses = list(analyzer.analyze_batch(data_by_symbol).values())
+        for analysis in analyses:
             symbol = analysis['symbol']
             decision = analysis['decision']
             confidence = analysis['confidence']
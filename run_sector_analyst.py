@@ -73,7 +73,8 @@ def main():
                 schedule_time=AutoTradingConfig.DAILY_REPORT_TIME
             )
             
-            # Start scheduler (will run once immediately then on schedule)
+            # Start scheduler (runs once immediately unless the scheduled run
+            # is within the hour, then on schedule)
             scheduler.start()
             
         except KeyboardInterrupt:
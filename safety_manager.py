@@ -3,6 +3,7 @@ Safety Manager
 Implements safety mechanisms for automated trading
 Integrated with TradeJournal for discipline tracking
 """
+from collections import deque
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, date
 from utils.logger import logger
@@ -12,6 +13,8 @@ from trade_journal import TradeJournal
 class SafetyManager:
     """Manages trading safety and risk controls"""
     
+    DAILY_TRADES_MAXLEN = 1024  # Entries/exits kept per day; oldest drop off once full
+    
     def __init__(self, config: AutoTradingConfig):
         """
         Initialize safety manager
@@ -22,10 +25,14 @@ class SafetyManager:
         self.config = config
         self.journal = TradeJournal()
         
+        # Static config folded once (config.get_max_position_value(c) == c * this)
+        self._max_position_size = config.MAX_POSITION_SIZE
+        
         # Daily tracking
         self.daily_start_capital = 0
+        self._daily_loss_floor = float('-inf')  # Capital below this breaks the daily limit
         self.current_date = None
-        self.daily_trades = []
+        self.daily_trades = deque(maxlen=self.DAILY_TRADES_MAXLEN)
         
         # Circuit breaker status
         self.circuit_breaker_active = False
@@ -34,7 +41,7 @@ class SafetyManager:
         # Stop-loss tracking logic moved to journal/strategies, 
         # but kept here for runtime monitoring
         self.stop_losses = {}  # {symbol: stop_loss_price}
-        self.take_profits = {} # {symbol: {tp1: price, tp2: price}}
+        self.take_profits = {} # {symbol: (tp1_price, tp2_price)}
     
     def calculate_position_size(self, entry_price: float, stop_loss: float, 
                                capital: float) -> Tuple[int, float, float]:
@@ -57,35 +64,18 @@ class SafetyManager:
         risk_basis = min(capital, self.config.INITIAL_CAPITAL)
         risk_amount = risk_basis * self.config.RISK_PER_TRADE_PCT
         
-        # 2. Calculate Risk Per Share
+        # 2. Calculate Risk Per Share (positive, since entry > stop)
         risk_per_share = entry_price - stop_loss
         
         # 3. Calculate Shares
         # Shares = Risk Amount / Risk Per Share
-        if risk_per_share > 0:
-            shares = int(risk_amount / risk_per_share)
-        else:
-            shares = 0
-            
-        # 4. Validate against constraints
-        position_value = shares * entry_price
+        shares = int(risk_amount / risk_per_share)
         
-        # Check max position size (don't put too much in one basket)
-        max_pos_value = self.config.get_max_position_value(capital)
-        if position_value > max_pos_value:
+        # 4. Cap at max position size (don't put too much in one basket).
+        # Small positions are accepted, so there is no minimum-size check.
+        max_pos_value = capital * self._max_position_size
+        if shares * entry_price > max_pos_value:
             shares = int(max_pos_value / entry_price)
-            position_value = shares * entry_price
-            risk_amount = shares * risk_per_share # Recalculate risk
-            
-        # Check min position size
-        min_pos_value = capital * self.config.MIN_POSITION_SIZE
-        if position_value < min_pos_value:
-            # If valid risk size is too small, we shouldn't trade
-            # But for testing/small accounts, we might allow minimum
-            if risk_amount < (risk_basis * 0.005): # Less than 0.5% risk
-                pass # Accept small trade
-            else:
-                pass 
 
         # Round down to nearest 100 for VN stock market (lot size)
         shares = (shares // 100) * 100
@@ -94,14 +84,24 @@ class SafetyManager:
         
         return shares, position_value, risk_amount
 
-    def reset_daily_tracking(self, current_capital: float):
-        """Reset daily tracking at market open"""
-        today = date.today()
+    def reset_daily_tracking(self, current_capital: float, today: Optional[date] = None):
+        """
+        Reset daily tracking at market open
+        
+        Args:
+            current_capital: Portfolio value to use as the day's starting capital
+            today: Current date, if the caller already read the clock
+        """
+        today = today or date.today()
         
         if self.current_date != today:
             self.current_date = today
             self.daily_start_capital = current_capital
-            self.daily_trades = []
+            self._daily_loss_floor = (
+                current_capital * (1 - self.config.MAX_DAILY_LOSS_PCT) + 1
+                if current_capital else float('-inf')
+            )
+            self.daily_trades.clear()
             
             # Check journal pause status
             if self.journal.is_paused():
@@ -145,6 +145,30 @@ class SafetyManager:
         
         return False
     
+    def check_risk_limits(self, current_capital: float, initial_capital: float) -> bool:
+        """
+        Check the daily loss limit and maximum drawdown together
+        
+        Both limits are compared as VND floors, so the usual within-limits
+        case is two comparisons; the percentage checks (and their circuit
+        breaker messages) only run once a floor is crossed. Floors sit 1 VND
+        above the limit so rounding right at the boundary is left to the
+        exact percentage checks.
+        
+        Args:
+            current_capital: Current portfolio value
+            initial_capital: Capital the drawdown is measured from
+            
+        Returns:
+            True if a limit was exceeded and the circuit breaker activated
+        """
+        drawdown_floor = initial_capital * (1 - self.config.MAX_DRAWDOWN_PCT) + 1
+        if current_capital >= self._daily_loss_floor and current_capital >= drawdown_floor:
+            return False
+        
+        return (self.check_daily_loss_limit(current_capital)
+                or self.check_max_drawdown(current_capital, initial_capital))
+    
     def activate_circuit_breaker(self, reason: str):
         """Activate circuit breaker to stop trading"""
         self.circuit_breaker_active = True
@@ -159,8 +183,8 @@ class SafetyManager:
     
     def is_circuit_breaker_active(self) -> bool:
         """Check if circuit breaker is active"""
-        # Also check journal pause
-        if self.journal.is_paused() and not self.circuit_breaker_active:
+        # Also check journal pause (nothing to do if the breaker is already on)
+        if not self.circuit_breaker_active and self.journal.is_paused():
              self.activate_circuit_breaker(f"Auto-pause active until {self.journal.pause_until}")
              
         return self.circuit_breaker_active
@@ -172,7 +196,7 @@ class SafetyManager:
         
     def set_take_profit(self, symbol: str, tp1: float, tp2: float):
         """Set take profit levels"""
-        self.take_profits[symbol] = {'tp1': tp1, 'tp2': tp2}
+        self.take_profits[symbol] = (tp1, tp2)
     
     def check_stop_losses(self, positions: Dict, current_prices: Dict[str, float]) -> List[Dict]:
         """
@@ -180,13 +204,15 @@ class SafetyManager:
         Returns list of dicts with symbol and reason
         """
         triggered = []
+        get_price = current_prices.get
+        get_stop = self.stop_losses.get
         
-        for symbol, pos in positions.items():
-            if symbol not in current_prices:
+        for symbol in positions:
+            current_price = get_price(symbol)
+            if current_price is None:
                 continue
             
-            current_price = current_prices[symbol]
-            stop_loss = self.stop_losses.get(symbol)
+            stop_loss = get_stop(symbol)
             
             if stop_loss and current_price <= stop_loss:
                 triggered.append({
@@ -198,33 +224,36 @@ class SafetyManager:
         
         return triggered
 
-    def update_trailing_stop(self, symbol: str, current_price: float, highest_price: float):
-        """Update trailing stop-loss (only after profit secured)"""
-        if symbol not in self.stop_losses:
-            return
-            
-        entry_price = 0 # Need to fetch from somewhere if we want precise logic
-        # For now, simplistic trailing stop if price > entry + 5%
+    def update_trailing_stops(self, highest_prices: Dict[str, float]):
+        """
+        Update trailing stop-losses for several positions in one pass
         
-        # Calculate new potential stop
-        new_stop = highest_price * (1 - self.config.TRAILING_STOP_PCT)
+        Args:
+            highest_prices: {symbol: highest price since entry}; symbols
+                without a stop-loss are ignored
+        """
+        factor = 1 - self.config.TRAILING_STOP_PCT
+        stop_losses = self.stop_losses
         
-        # Only move stop UP
-        if new_stop > self.stop_losses[symbol]:
-            old_stop = self.stop_losses[symbol]
-            self.stop_losses[symbol] = new_stop
-            logger.info(f"📈 Trailing stop updated for {symbol}: {old_stop:,.0f} → {new_stop:,.0f}")
+        for symbol, highest_price in highest_prices.items():
+            old_stop = stop_losses.get(symbol)
+            if old_stop is None:
+                continue
+            
+            # Only move stop UP
+            new_stop = highest_price * factor
+            if new_stop > old_stop:
+                stop_losses[symbol] = new_stop
+                logger.info(f"📈 Trailing stop updated for {symbol}: {old_stop:,.0f} → {new_stop:,.0f}")
     
     def validate_trade(self, symbol: str, action: str, shares: int, 
                       current_positions: int, current_capital: float) -> Tuple[bool, Optional[str]]:
         """Validate if a trade is safe to execute"""
-        # Check circuit breaker & pause
+        # Check circuit breaker & pause (an active journal pause trips the
+        # breaker inside is_circuit_breaker_active, so one call covers both)
         if self.is_circuit_breaker_active():
             return False, f"Circuit breaker active: {self.circuit_breaker_reason}"
         
-        if self.journal.is_paused():
-            return False, f"Trading paused until {self.journal.pause_until}"
-        
         # Check position limits for buys
         if action == 'BUY':
             if current_positions >= self.config.MAX_OPEN_POSITIONS:
@@ -257,12 +286,15 @@ class SafetyManager:
     
     def get_safety_status(self) -> Dict:
         """Get current safety status"""
-        journal_summary = self.journal.get_performance_summary()
+        # Read the journal's running pause state directly; its performance
+        # summary rescans every entry for stats this status doesn't use
+        journal = self.journal
+        is_paused = journal.is_paused()
         return {
             'circuit_breaker_active': self.circuit_breaker_active,
             'circuit_breaker_reason': self.circuit_breaker_reason,
-            'consecutive_losses': journal_summary.get('consecutive_losses', 0),
-            'is_paused': journal_summary.get('is_paused', False),
-            'pause_until': journal_summary.get('pause_until'),
+            'consecutive_losses': journal.consecutive_losses,
+            'is_paused': is_paused,
+            'pause_until': journal.pause_until.isoformat() if journal.pause_until else None,
             'active_stop_losses': len(self.stop_losses)
         }
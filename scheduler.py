@@ -2,16 +2,36 @@
 Scheduler Module
 Handles automatic scheduling of stock analysis
 """
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.triggers.cron import CronTrigger
-from datetime import datetime
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
 from utils.logger import logger
 from config import Config
 import sys
 
+@lru_cache(maxsize=16)
+def _parse_schedule_time(schedule_time: str) -> Tuple[int, int]:
+    """
+    Parse an HH:MM schedule time
+    
+    Raises:
+        ValueError: If schedule_time is not a valid HH:MM time
+    """
+    hour, minute = map(int, schedule_time.split(':'))
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid schedule time: {schedule_time}")
+    return hour, minute
+
 class AnalysisScheduler:
     """Manages scheduled execution of stock analysis"""
     
+    # Skip the startup run if the scheduled one is this close (seconds)
+    INITIAL_RUN_MIN_GAP = 3600
+    
     def __init__(self, analysis_function, schedule_time=None):
         """
         Initialize scheduler
@@ -20,37 +40,38 @@ class AnalysisScheduler:
             analysis_function: Function to call on schedule
             schedule_time: Time to run (HH:MM format), defaults to Config.SCHEDULE_TIME
         """
-        self.scheduler = BlockingScheduler()
         self.analysis_function = analysis_function
         self.schedule_time = schedule_time or Config.SCHEDULE_TIME
-        self.jobs = []  # Track multiple jobs
+        self.jobs: List[Dict] = []  # Track multiple jobs
+        self.running = False
+        
+        # Daily jobs due next: heap of (epoch_time, seq, job); seq breaks ties
+        self._queue: List[Tuple[float, int, Dict]] = []
+        self._seq = itertools.count()
+        self._wakeup = threading.Event()  # Set by stop()/add_job() to cut a wait short
     
     def start(self):
         """Start the scheduler"""
         try:
-            # Parse schedule time (HH:MM format)
-            hour, minute = map(int, self.schedule_time.split(':'))
-            
             # Add job to scheduler
-            job = self.scheduler.add_job(
-                self.analysis_function,
-                trigger=CronTrigger(hour=hour, minute=minute),
-                id='daily_stock_analysis',
-                name='Daily Stock Analysis',
-                replace_existing=True
-            )
-            self.jobs.append(job)
+            job = self._add(self.analysis_function, self.schedule_time,
+                            'daily_stock_analysis', 'Daily Stock Analysis')
             
             logger.info(f"Scheduler started. Will run daily at {self.schedule_time}")
             logger.info("Press Ctrl+C to exit")
             
-            # Run once immediately on startup
-            logger.info("Running initial analysis...")
-            self.analysis_function()
+            # Run once immediately on startup, unless the scheduled run is
+            # close enough that it would just repeat the same analysis
+            until_next = self._next_fire(job, datetime.now()).timestamp() - time.time()
+            if until_next > self.INITIAL_RUN_MIN_GAP:
+                logger.info("Running initial analysis...")
+                self.analysis_function()
+            else:
+                logger.info(f"Scheduled run in {until_next / 60:.0f} min, skipping initial analysis")
             
             # Start scheduler
-            self.scheduler.start()
-            
+            self._run_loop()
+        
         except (KeyboardInterrupt, SystemExit):
             logger.info("Scheduler stopped by user")
             self.stop()
@@ -58,10 +79,71 @@ class AnalysisScheduler:
             logger.error(f"Scheduler error: {e}")
             self.stop()
     
+    def _run_loop(self):
+        """Sleep until the earliest job is due, run it, then book its next day"""
+        self.running = True
+        
+        # Fire times are taken from when the loop starts, as a cron would
+        now = datetime.now()
+        self._queue = []
+        for job in self.jobs:
+            self._push(job, now)
+        
+        while self.running and self._queue:
+            when, _, job = self._queue[0]
+            delay = when - time.time()
+            if delay > 0:
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
+                continue  # Re-check: stopped, woken early, or a job was added
+            
+            heapq.heappop(self._queue)
+            if not any(j is job for j in self.jobs):
+                continue  # Replaced since it was queued
+            
+            try:
+                job['function']()
+            except Exception as e:
+                logger.error(f"Job '{job['name']}' failed: {e}", exc_info=True)
+            
+            self._push(job, datetime.now())
+    
+    def _next_fire(self, job: Dict, now: datetime) -> datetime:
+        """Next daily fire time of a job after now"""
+        at = now.replace(hour=job['hour'], minute=job['minute'], second=0, microsecond=0)
+        if at <= now:
+            at += timedelta(days=1)
+        return at
+    
+    def _push(self, job: Dict, now: datetime):
+        """Queue a job for its next daily fire time after now"""
+        at = self._next_fire(job, now)
+        heapq.heappush(self._queue, (at.timestamp(), next(self._seq), job))
+    
+    def _add(self, function: Callable, schedule_time: str, job_id: str, job_name: str) -> Dict:
+        """
+        Register a daily job, replacing any existing job with the same id
+        
+        Raises:
+            ValueError: If schedule_time is not a valid HH:MM time
+        """
+        hour, minute = _parse_schedule_time(schedule_time)
+        
+        job = {'id': job_id, 'name': job_name, 'function': function,
+               'hour': hour, 'minute': minute}
+        self.jobs = [j for j in self.jobs if j['id'] != job_id]
+        self.jobs.append(job)
+        
+        if self.running:
+            self._push(job, datetime.now())
+            self._wakeup.set()
+        return job
+    
     def stop(self):
         """Stop the scheduler gracefully"""
-        if self.scheduler.running:
-            self.scheduler.shutdown()
+        if self.running:
+            self.running = False
+            self._wakeup.set()
             logger.info("Scheduler shut down successfully")
     
     def add_job(self, function, schedule_time, job_id, job_name):
@@ -75,18 +157,9 @@ class AnalysisScheduler:
             job_name: Human-readable job name
         """
         try:
-            hour, minute = map(int, schedule_time.split(':'))
-            
-            job = self.scheduler.add_job(
-                function,
-                trigger=CronTrigger(hour=hour, minute=minute),
-                id=job_id,
-                name=job_name,
-                replace_existing=True
-            )
-            self.jobs.append(job)
+            self._add(function, schedule_time, job_id, job_name)
             logger.info(f"Added job '{job_name}' scheduled for {schedule_time}")
-            
+        
         except Exception as e:
             logger.error(f"Failed to add job '{job_name}': {e}")
     
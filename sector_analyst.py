@@ -3,15 +3,22 @@ Sector Analyst Module
 Monitors specific stocks with custom rules and generates daily reports
 """
 from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from functools import partial
+from itertools import pairwise
 import json
 import os
+import threading
+import time
 from utils.logger import logger
 from external_data_scraper import (
     BrentOilMonitor,
     ShanghaiSteelMonitor,
     VNStockFundamentalScraper,
-    VNNewsScanner
+    VNNewsScanner,
+    create_session
 )
 
 
@@ -20,6 +27,8 @@ class SectorAnalyst:
     Sector Analyst - Monitors portfolio stocks with specific triggers
     """
     
+    MONITOR_TIMEOUT = 30  # Seconds to wait for the monitors before reporting them unavailable
+    
     def __init__(self, config=None):
         """
         Initialize Sector Analyst
@@ -33,11 +42,24 @@ class SectorAnalyst:
         
         self.config = config
         
-        # Initialize data monitors
-        self.oil_monitor = BrentOilMonitor()
-        self.steel_monitor = ShanghaiSteelMonitor()
-        self.fundamental_scraper = VNStockFundamentalScraper()
-        self.news_scanner = VNNewsScanner()
+        # Rule thresholds, read from config once (defaults if not configured)
+        self.fpt_pe_threshold = getattr(config, 'FPT_PE_THRESHOLD', 18.0)
+        self.fpt_growth_threshold = getattr(config, 'FPT_REVENUE_GROWTH_THRESHOLD', 15.0)
+        self.pvs_brent_threshold = getattr(config, 'PVS_BRENT_THRESHOLD', 85.0)
+        self.pvs_brent_days_stable = getattr(config, 'PVS_BRENT_DAYS_STABLE', 7)
+        self.kbc_keywords = getattr(config, 'KBC_KEYWORDS', [
+            'KBC ký biên bản ghi nhớ',
+            'Foxconn',
+            'LG Innotek'
+        ])
+        self.hpg_hrc_weeks_increase = getattr(config, 'HPG_HRC_WEEKS_INCREASE', 2)
+        
+        # Initialize data monitors on one shared connection pool
+        self.session = create_session(pool_size=4)  # One connection per concurrent monitor
+        self.oil_monitor = BrentOilMonitor(session=self.session)
+        self.steel_monitor = ShanghaiSteelMonitor(session=self.session)
+        self.fundamental_scraper = VNStockFundamentalScraper(session=self.session)
+        self.news_scanner = VNNewsScanner(session=self.session)
         
         # History file for tracking trends
         self.history_file = os.path.join(
@@ -46,6 +68,17 @@ class SectorAnalyst:
             'sector_history.json'
         )
         self._ensure_history_file()
+        
+        # History is read from disk once, then kept in memory; each update
+        # only writes the file back
+        self._history: Optional[Dict] = None
+        
+        # Inside _batch_history_writes() saves only mark the history dirty
+        self._holding_history_writes = False
+        self._history_dirty = False
+        
+        # Monitors run concurrently; guards each load-update-save of the history file
+        self._history_lock = threading.Lock()
     
     def _ensure_history_file(self):
         """Ensure history file and directory exist"""
@@ -60,22 +93,51 @@ class SectorAnalyst:
                 }, f, indent=2)
     
     def _load_history(self) -> Dict:
-        """Load historical data"""
-        try:
-            with open(self.history_file, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load history: {e}")
-            return {'brent_oil': {}, 'hrc_steel': {}, 'fpt_fundamentals': {}, 'kbc_news': []}
+        """Load historical data (from disk on first use, then the in-memory copy)"""
+        if self._history is None:
+            try:
+                with open(self.history_file, 'r') as f:
+                    self._history = json.load(f)
+            except Exception as e:
+                logger.error(f"Failed to load history: {e}")
+                self._history = {'brent_oil': {}, 'hrc_steel': {}, 'fpt_fundamentals': {}, 'kbc_news': []}
+        return self._history
     
     def _save_history(self, history: Dict):
-        """Save historical data"""
+        """Save historical data (deferred while writes are batched)"""
+        if self._holding_history_writes:
+            self._history_dirty = True
+            return
+        
+        # Write a sibling temp file and swap it in, so a crash mid-write
+        # leaves the previous history intact instead of a truncated file
+        tmp_file = self.history_file + '.tmp'
         try:
-            with open(self.history_file, 'w') as f:
+            with open(tmp_file, 'w') as f:
                 json.dump(history, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.history_file)
         except Exception as e:
             logger.error(f"Failed to save history: {e}")
     
+    @contextmanager
+    def _batch_history_writes(self):
+        """
+        Defer history saves made inside the block to a single write on exit
+        
+        A monitor that outlives the block (e.g. timed out) saves directly.
+        """
+        self._holding_history_writes = True
+        try:
+            yield
+        finally:
+            with self._history_lock:
+                self._holding_history_writes = False
+                if self._history_dirty:
+                    self._history_dirty = False
+                    self._save_history(self._history)
+    
     def monitor_fpt(self) -> Dict:
         """
         Monitor FPT stock
@@ -107,7 +169,7 @@ class SectorAnalyst:
             
             # Check P/E ratio
             if result['pe_ratio']:
-                pe_threshold = getattr(self.config, 'FPT_PE_THRESHOLD', 18.0)
+                pe_threshold = self.fpt_pe_threshold
                 if result['pe_ratio'] < pe_threshold:
                     result['alerts'].append({
                         'type': 'BUY_ZONE',
@@ -121,7 +183,7 @@ class SectorAnalyst:
             
             # Check revenue growth (if available)
             if result['revenue_growth'] is not None:
-                growth_threshold = getattr(self.config, 'FPT_REVENUE_GROWTH_THRESHOLD', 15.0)
+                growth_threshold = self.fpt_growth_threshold
                 if result['revenue_growth'] < growth_threshold:
                     result['alerts'].append({
                         'type': 'DANGER',
@@ -141,11 +203,14 @@ class SectorAnalyst:
         
         return result
     
-    def monitor_pvs(self) -> Dict:
+    def monitor_pvs(self, now: Optional[datetime] = None) -> Dict:
         """
         Monitor PVS stock based on Brent oil prices
         - Signal BUY if Brent > $85 and stable for 1 week
         
+        Args:
+            now: Report time the price is recorded under (defaults to current time)
+        
         Returns:
             Dict with monitoring results and signals
         """
@@ -169,21 +234,23 @@ class SectorAnalyst:
             result['data_source'] = oil_data['source']
             
             # Save to history
-            history = self._load_history()
-            today = datetime.now().strftime('%Y-%m-%d')
-            history['brent_oil'][today] = oil_data['price']
-            
-            # Keep only last 30 days
-            cutoff_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-            history['brent_oil'] = {
-                k: v for k, v in history['brent_oil'].items()
-                if k >= cutoff_date
-            }
-            self._save_history(history)
+            now = now or datetime.now()
+            with self._history_lock:
+                history = self._load_history()
+                today = now.strftime('%Y-%m-%d')
+                history['brent_oil'][today] = oil_data['price']
+                
+                # Keep only last 30 days
+                cutoff_date = (now - timedelta(days=30)).strftime('%Y-%m-%d')
+                history['brent_oil'] = {
+                    k: v for k, v in history['brent_oil'].items()
+                    if k >= cutoff_date
+                }
+                self._save_history(history)
             
             # Check for stable high price (> $85 for 7 days)
-            threshold = getattr(self.config, 'PVS_BRENT_THRESHOLD', 85.0)
-            days_stable = getattr(self.config, 'PVS_BRENT_DAYS_STABLE', 7)
+            threshold = self.pvs_brent_threshold
+            days_stable = self.pvs_brent_days_stable
             
             # Get last 7 days of prices
             recent_prices = list(history['brent_oil'].values())[-days_stable:]
@@ -241,11 +308,7 @@ class SectorAnalyst:
         }
         
         # Get keywords from config
-        keywords = getattr(self.config, 'KBC_KEYWORDS', [
-            'KBC ký biên bản ghi nhớ',
-            'Foxconn',
-            'LG Innotek'
-        ])
+        keywords = self.kbc_keywords
         
         # Scan news
         news_data = self.news_scanner.scan_for_keywords('KBC', keywords, days=7)
@@ -279,11 +342,14 @@ class SectorAnalyst:
         
         return result
     
-    def monitor_hpg(self) -> Dict:
+    def monitor_hpg(self, now: Optional[datetime] = None) -> Dict:
         """
         Monitor HPG stock via Shanghai steel HRC prices
         - Signal BUY if HRC increases for 2 consecutive weeks
         
+        Args:
+            now: Report time the price is recorded under (defaults to current time)
+        
         Returns:
             Dict with monitoring results and signals
         """
@@ -307,32 +373,30 @@ class SectorAnalyst:
             result['data_source'] = steel_data['source']
             
             # Save to history (weekly basis)
-            history = self._load_history()
-            
-            # Get current week number
-            current_week = datetime.now().strftime('%Y-W%U')
-            history['hrc_steel'][current_week] = steel_data['price']
-            
-            # Keep only last 12 weeks
-            all_weeks = sorted(history['hrc_steel'].keys())
-            if len(all_weeks) > 12:
-                history['hrc_steel'] = {
-                    k: history['hrc_steel'][k] for k in all_weeks[-12:]
-                }
-            self._save_history(history)
+            with self._history_lock:
+                history = self._load_history()
+                
+                # Get current week number
+                current_week = (now or datetime.now()).strftime('%Y-W%U')
+                history['hrc_steel'][current_week] = steel_data['price']
+                
+                # Keep only last 12 weeks
+                all_weeks = sorted(history['hrc_steel'].keys())
+                if len(all_weeks) > 12:
+                    history['hrc_steel'] = {
+                        k: history['hrc_steel'][k] for k in all_weeks[-12:]
+                    }
+                self._save_history(history)
             
             # Check for consecutive increases
-            weeks_threshold = getattr(self.config, 'HPG_HRC_WEEKS_INCREASE', 2)
+            weeks_threshold = self.hpg_hrc_weeks_increase
             recent_weeks = sorted(history['hrc_steel'].keys())[-weeks_threshold-1:]
             
             if len(recent_weeks) >= weeks_threshold + 1:
                 recent_prices = [history['hrc_steel'][w] for w in recent_weeks]
                 
                 # Check if prices are increasing
-                is_increasing = all(
-                    recent_prices[i] < recent_prices[i+1]
-                    for i in range(len(recent_prices) - 1)
-                )
+                is_increasing = all(a < b for a, b in pairwise(recent_prices))
                 
                 if is_increasing:
                     result['alerts'].append({
@@ -362,6 +426,60 @@ class SectorAnalyst:
         
         return result
     
+    def _collect_monitor(self, symbol: str, future: Future, deadline: float) -> Dict:
+        """
+        Wait for a monitor's result, falling back to an unavailable stub
+        
+        Args:
+            symbol: Stock symbol the monitor covers
+            future: Running monitor call
+            deadline: time.monotonic() by which all monitors should be done
+            
+        Returns:
+            The monitor result, or a DATA_UNAVAILABLE result if it failed or timed out
+        """
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except Exception as e:
+            logger.error(f"Monitoring {symbol} failed: {e!r}")
+            return {
+                'symbol': symbol,
+                'articles': [],
+                'alerts': [{
+                    'type': 'DATA_UNAVAILABLE',
+                    'message': f"⚠️ Không lấy được dữ liệu {symbol}",
+                    'severity': 'warning'
+                }],
+                'signals': [],
+                'data_available': False
+            }
+    
+    def _render_section(self, report_lines: List[str], title: str, result: Dict):
+        """
+        Append one stock's section to the report
+        
+        Args:
+            report_lines: Report being built
+            title: Section heading
+            result: Monitor result for the stock
+        """
+        report_lines.append(title)
+        report_lines.append("-" * 40)
+        if result['data_available']:
+            for alert in result['alerts']:
+                report_lines.append(alert['message'])
+            for signal in result['signals']:
+                report_lines.append(f"  • {signal}")
+            if result.get('articles'):
+                report_lines.append("  📰 Tin tức nổi bật:")
+                for article in result['articles'][:3]:
+                    report_lines.append(f"    - {article['title']}")
+                    report_lines.append(f"      {article['link']}")
+            report_lines.append(f"  Nguồn: {result.get('data_source', 'N/A')}")
+        else:
+            report_lines.append("  ⚠️ Dữ liệu không khả dụng")
+        report_lines.append("")
+    
     def generate_daily_report(self, dry_run: bool = False) -> str:
         """
         Generate comprehensive daily sector analysis report
@@ -374,89 +492,53 @@ class SectorAnalyst:
         """
         logger.info("Generating daily sector analysis report...")
         
-        # Monitor all stocks
-        fpt_result = self.monitor_fpt()
-        pvs_result = self.monitor_pvs()
-        kbc_result = self.monitor_kbc()
-        hpg_result = self.monitor_hpg()
+        # One clock read for the whole report, so history keys and the
+        # header agree even if the monitors straddle midnight
+        now = datetime.now()
+        
+        # (symbol, report heading, monitor), in report order
+        sections = (
+            ('FPT', "🏢 FPT - Công nghệ", self.monitor_fpt),
+            ('PVS', "⛽ PVS - Dịch vụ dầu khí", partial(self.monitor_pvs, now)),
+            ('KBC', "🔧 KBC - Xây dựng & Cơ khí", self.monitor_kbc),
+            ('HPG', "🏗️ HPG - Thép", partial(self.monitor_hpg, now)),
+        )
+        
+        # Monitor all stocks; each blocks on network I/O, so run them together.
+        # PVS and HPG both record history; write the file once for the report
+        pool = ThreadPoolExecutor(max_workers=len(sections), thread_name_prefix="sector-monitor")
+        try:
+            with self._batch_history_writes():
+                futures = [(symbol, pool.submit(monitor)) for symbol, _, monitor in sections]
+                deadline = time.monotonic() + self.MONITOR_TIMEOUT
+                results = [
+                    self._collect_monitor(symbol, future, deadline) for symbol, future in futures
+                ]
+        finally:
+            # Don't hold the report for a timed-out monitor. A monitor that is
+            # already running can't be stopped and is still joined at interpreter
+            # exit, but its request timeouts and capped retries bound that wait.
+            pool.shutdown(wait=False, cancel_futures=True)
         
         # Build report
         report_lines = [
             "📊 BÁO CÁO PHÂN TÍCH NGÀNH",
-            f"⏰ {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+            f"⏰ {now.strftime('%d/%m/%Y %H:%M')}",
             "=" * 40,
             ""
         ]
         
-        # FPT Section
-        report_lines.append("🏢 FPT - Công nghệ")
-        report_lines.append("-" * 40)
-        if fpt_result['data_available']:
-            for alert in fpt_result['alerts']:
-                report_lines.append(alert['message'])
-            for signal in fpt_result['signals']:
-                report_lines.append(f"  • {signal}")
-            report_lines.append(f"  Nguồn: {fpt_result.get('data_source', 'N/A')}")
-        else:
-            report_lines.append("  ⚠️ Dữ liệu không khả dụng")
-        report_lines.append("")
-        
-        # PVS Section
-        report_lines.append("⛽ PVS - Dịch vụ dầu khí")
-        report_lines.append("-" * 40)
-        if pvs_result['data_available']:
-            for alert in pvs_result['alerts']:
-                report_lines.append(alert['message'])
-            for signal in pvs_result['signals']:
-                report_lines.append(f"  • {signal}")
-            report_lines.append(f"  Nguồn: {pvs_result.get('data_source', 'N/A')}")
-        else:
-            report_lines.append("  ⚠️ Dữ liệu không khả dụng")
-        report_lines.append("")
-        
-        # KBC Section
-        report_lines.append("🔧 KBC - Xây dựng & Cơ khí")
-        report_lines.append("-" * 40)
-        if kbc_result['data_available']:
-            for alert in kbc_result['alerts']:
-                report_lines.append(alert['message'])
-            for signal in kbc_result['signals']:
-                report_lines.append(f"  • {signal}")
-            if kbc_result['articles']:
-                report_lines.append("  📰 Tin tức nổi bật:")
-                for article in kbc_result['articles'][:3]:
-                    report_lines.append(f"    - {article['title']}")
-                    report_lines.append(f"      {article['link']}")
-            report_lines.append(f"  Nguồn: {kbc_result.get('data_source', 'N/A')}")
-        else:
-            report_lines.append("  ⚠️ Dữ liệu không khả dụng")
-        report_lines.append("")
-        
-        # HPG Section
-        report_lines.append("🏗️ HPG - Thép")
-        report_lines.append("-" * 40)
-        if hpg_result['data_available']:
-            for alert in hpg_result['alerts']:
-                report_lines.append(alert['message'])
-            for signal in hpg_result['signals']:
-                report_lines.append(f"  • {signal}")
-            report_lines.append(f"  Nguồn: {hpg_result.get('data_source', 'N/A')}")
-        else:
-            report_lines.append("  ⚠️ Dữ liệu không khả dụng")
-        report_lines.append("")
+        # One section per monitored stock, in monitor order
+        for (_, title, _), result in zip(sections, results):
+            self._render_section(report_lines, title, result)
         
         # Summary
         report_lines.append("=" * 40)
-        total_alerts = (
-            len(fpt_result['alerts']) +
-            len(pvs_result['alerts']) +
-            len(kbc_result['alerts']) +
-            len(hpg_result['alerts'])
-        )
+        total_alerts = sum(len(result['alerts']) for result in results)
         
         # Count buy signals
         buy_signals = []
-        for result in [fpt_result, pvs_result, kbc_result, hpg_result]:
+        for result in results:
             for alert in result['alerts']:
                 if alert['type'] in ['BUY_ZONE', 'BUY_SIGNAL']:
                     buy_signals.append(result['symbol'])
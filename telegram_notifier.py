@@ -3,17 +3,52 @@ Telegram Notifier Module
 Sends messages to Telegram using Bot API
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional
 from utils.logger import logger
 from config import Config
 
+def _utf16_len(text: str) -> int:
+    """Length of text as Telegram counts it (UTF-16 code units)"""
+    return len(text.encode('utf-16-le')) // 2
+
 class TelegramNotifier:
     """Handles sending messages to Telegram"""
     
+    # Failures where Telegram cannot have accepted the message: flood
+    # control and service unavailable. 500/502/504 and read timeouts may
+    # follow a delivered send, so they aren't retried
+    RETRY_STATUSES = (429, 503)
+    
     def __init__(self):
         self.bot_token = Config.TELEGRAM_BOT_TOKEN
         self.chat_id = Config.TELEGRAM_CHAT_ID
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        
+        # Keep-alive session so repeated sends reuse the TLS connection
+        self.session = requests.Session()
+        retries = Retry(
+            total=3,
+            read=0,  # A timed-out POST may already be delivered; never resend it
+            backoff_factor=0.3,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({'GET', 'POST'}),
+            respect_retry_after_header=False,  # Flood-control waits would stall the trading loop
+            raise_on_status=False  # Hand the last response back for logging
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+        self.session.mount("https://", adapter)
+    
+    def close(self):
+        """Close the pooled connections"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def send_message(self, message: str, parse_mode: str = "Markdown") -> bool:
         """
@@ -36,7 +71,7 @@ class TelegramNotifier:
                 'disable_web_page_preview': True
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self.session.post(url, json=payload, timeout=10)
             
             if response.status_code == 200:
                 logger.info("Message sent to Telegram successfully")
@@ -55,12 +90,14 @@ class TelegramNotifier:
         
         Args:
             message: Long message text
-            chunk_size: Maximum size per chunk
+            chunk_size: Maximum size per chunk, in UTF-16 code units
             
         Returns:
             True if all chunks sent successfully
         """
-        if len(message) <= chunk_size:
+        # A character is at most two UTF-16 units, so short alerts fit without
+        # encoding them to measure
+        if len(message) * 2 <= chunk_size or _utf16_len(message) <= chunk_size:
             return self.send_message(message)
         
         # Split into chunks
@@ -75,16 +112,21 @@ class TelegramNotifier:
         return success
     
     def _split_message(self, message: str, chunk_size: int) -> list:
-        """Split message into chunks at line breaks"""
+        """
+        Split message into chunks at line breaks
+        
+        Sizes are counted in UTF-16 code units, as Telegram counts its
+        message limit: Vietnamese letters are one unit, most emoji two.
+        """
         lines = message.split('\n')
         chunks = []
         current_chunk = []
         current_size = 0
         
         for line in lines:
-            line_size = len(line) + 1  # +1 for newline
+            line_size = _utf16_len(line) + 1  # +1 for newline
             
-            if current_size + line_size > chunk_size:
+            if current_size + line_size > chunk_size and current_chunk:
                 # Save current chunk and start new one
                 chunks.append('\n'.join(current_chunk))
                 current_chunk = [line]
@@ -108,7 +150,7 @@ class TelegramNotifier:
         """
         try:
             url = f"{self.base_url}/getMe"
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=10)
             
             if response.status_code == 200:
                 bot_info = response.json()
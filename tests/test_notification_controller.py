@@ -0,0 +1,64 @@
+"""Tests for the background trade-alert sender in NotificationController"""
+import threading
+import time
+import unittest
+
+from notification_controller import NotificationController
+
+
+class SlowNotifier:
+    """Notifier whose sends block until released"""
+    
+    def __init__(self):
+        self.sent = []
+        self.release = threading.Event()
+    
+    def send_long_message(self, message):
+        self.release.wait(5)
+        self.sent.append(message)
+        return True
+    
+    send_message = send_long_message
+
+
+class AlertWorkerTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.notifier = SlowNotifier()
+        self.controller = NotificationController(self.notifier)
+        self.controller.alert_coalesce_seconds = 0
+    
+    def tearDown(self):
+        self.notifier.release.set()
+        self.controller.flush_alerts(timeout=2)
+    
+    def _wait_for_sends(self, count, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while len(self.notifier.sent) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+    
+    def test_alert_after_timed_out_flush_is_sent(self):
+        self.assertTrue(self.controller.send_stop_loss_alert('FPT', 1000, -5))
+        self.controller.flush_alerts(timeout=0.2)  # Worker is stuck in the send
+        
+        self.assertTrue(self.controller.send_stop_loss_alert('HPG', 2000, -6))
+        self.notifier.release.set()
+        self._wait_for_sends(2)
+        
+        self.assertEqual(len(self.notifier.sent), 2)
+        self.assertIn('HPG', self.notifier.sent[1])
+        self.assertEqual(self.controller._alert_queue.qsize(), 0)
+    
+    def test_alert_after_completed_flush_starts_new_worker(self):
+        self.notifier.release.set()
+        self.controller.send_stop_loss_alert('FPT', 1000, -5)
+        self.controller.flush_alerts(timeout=2)
+        self.assertIsNone(self.controller._alert_thread)
+        
+        self.controller.send_stop_loss_alert('HPG', 2000, -6)
+        self._wait_for_sends(2)
+        self.assertEqual(len(self.notifier.sent), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,7 @@ Records every trade with full context, analysis, and results
 import json
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from pathlib import Path
 from utils.logger import logger
 
@@ -59,6 +59,15 @@ class TradeJournal:
         self.journal_file = journal_file
         self.entries: List[JournalEntry] = []
         
+        # Entry statistics for get_performance_summary, keyed by _entries_version
+        # (bumped whenever log_entry/log_exit change the entries)
+        self._entries_version = 0
+        self._summary_cache = None
+        
+        # Indices of open entries per symbol, oldest first (the last one is
+        # what log_exit closes)
+        self._open_by_symbol: Dict[str, List[int]] = {}
+        
         # Ensure data directory exists
         Path(journal_file).parent.mkdir(exist_ok=True)
         
@@ -77,7 +86,7 @@ class TradeJournal:
         Log a new trade entry
         
         Args:
-            trade_data: Trade execution data
+            trade_data: Trade execution data ('time' is used as the entry time if present)
             strategy: Entry strategy used
             market_regime: Market regime at entry
             stop_loss: Stop loss price
@@ -90,7 +99,7 @@ class TradeJournal:
             Entry ID
         """
         entry = JournalEntry(
-            timestamp=datetime.now().isoformat(),
+            timestamp=(trade_data.get('time') or datetime.now()).isoformat(),
             symbol=trade_data['symbol'],
             action=trade_data['action'],
             strategy=strategy,
@@ -107,6 +116,8 @@ class TradeJournal:
         )
         
         self.entries.append(entry)
+        self._open_by_symbol.setdefault(entry.symbol, []).append(len(self.entries) - 1)
+        self._entries_version += 1
         self._save_journal()
         
         logger.info(f"📝 Journal entry created: {entry.symbol} {entry.action} via {entry.strategy}")
@@ -119,33 +130,37 @@ class TradeJournal:
         
         Args:
             symbol: Stock symbol
-            exit_data: Exit trade data
+            exit_data: Exit trade data ('time' is used as the exit time if present)
             notes: Optional notes/lessons learned
         """
         # Find most recent open entry for this symbol
-        for entry in reversed(self.entries):
-            if entry.symbol == symbol and entry.exit_timestamp is None:
-                entry.exit_timestamp = datetime.now().isoformat()
-                entry.exit_price = exit_data['price']
-                entry.exit_reason = exit_data.get('reason', '')
-                entry.pnl = exit_data.get('pnl', 0)
-                entry.pnl_percentage = exit_data.get('pnl_percentage', 0)
-                entry.notes = notes
-                
-                # Track consecutive losses
-                if entry.pnl < 0:
-                    self.consecutive_losses += 1
-                    logger.warning(f"📉 Consecutive losses: {self.consecutive_losses}")
-                else:
-                    self.consecutive_losses = 0  # Reset on win
-                
-                # Check for auto-pause
-                if self.consecutive_losses >= 3:
-                    self._trigger_auto_pause()
-                
+        open_indices = self._open_by_symbol.get(symbol)
+        if open_indices:
+            entry = self.entries[open_indices.pop()]
+            if not open_indices:
+                del self._open_by_symbol[symbol]
+            
+            entry.exit_timestamp = (exit_data.get('time') or datetime.now()).isoformat()
+            entry.exit_price = exit_data['price']
+            entry.exit_reason = exit_data.get('reason', '')
+            entry.pnl = exit_data.get('pnl', 0)
+            entry.pnl_percentage = exit_data.get('pnl_percentage', 0)
+            entry.notes = notes
+            self._entries_version += 1
+            
+            # Track consecutive losses
+            if entry.pnl < 0:
+                self.consecutive_losses += 1
+                logger.warning(f"📉 Consecutive losses: {self.consecutive_losses}")
+            else:
+                self.consecutive_losses = 0  # Reset on win
+            
+            # Check for auto-pause (its save already includes this exit)
+            if self.consecutive_losses >= 3:
+                self._trigger_auto_pause()
+            else:
                 self._save_journal()
-                logger.info(f"📝 Journal exit logged: {symbol} P&L: {entry.pnl:+,.0f} VND")
-                break
+            logger.info(f"📝 Journal exit logged: {symbol} P&L: {entry.pnl:+,.0f} VND")
     
     def _trigger_auto_pause(self):
         """Trigger 48-hour auto pause after 3 consecutive losses"""
@@ -181,6 +196,23 @@ class TradeJournal:
     
     def get_performance_summary(self) -> Dict:
         """Get performance analytics from journal"""
+        # Entry statistics only change through log_entry/log_exit; reuse them
+        # until then
+        version = self._entries_version
+        if self._summary_cache is None or self._summary_cache[0] != version:
+            self._summary_cache = (version, self._summarize_entries())
+        summary = dict(self._summary_cache[1])
+        
+        # Pause state moves with the clock and manual resumes, so read it fresh
+        if 'wins' in summary:  # Only reported once trades have completed
+            summary['consecutive_losses'] = self.consecutive_losses
+            summary['is_paused'] = self.is_paused()
+            summary['pause_until'] = self.pause_until.isoformat() if self.pause_until else None
+        
+        return summary
+    
+    def _summarize_entries(self) -> Dict:
+        """Compute the entry statistics for get_performance_summary"""
         if not self.entries:
             return {
                 'total_trades': 0,
@@ -190,49 +222,47 @@ class TradeJournal:
                 'best_strategy': 'N/A'
             }
         
-        # Filter completed trades
-        completed = [e for e in self.entries if e.exit_timestamp is not None]
+        # One pass: open count, completed-trade totals and P&L per strategy
+        open_positions = completed = wins = losses = 0
+        sum_rr = total_pnl = 0
+        strategy_pnl = {}
+        for e in self.entries:
+            if e.exit_timestamp is None:
+                open_positions += 1
+                continue
+            
+            pnl = e.pnl
+            completed += 1
+            sum_rr += e.risk_reward
+            total_pnl += pnl
+            if pnl > 0:
+                wins += 1
+            elif pnl < 0:
+                losses += 1
+            strategy_pnl[e.strategy] = strategy_pnl.get(e.strategy, 0) + pnl
         
         if not completed:
             return {
                 'total_trades': len(self.entries),
-                'open_positions': len([e for e in self.entries if e.exit_timestamp is None]),
+                'open_positions': open_positions,
                 'win_rate': 0,
                 'avg_rr': 0,
                 'total_pnl': 0,
                 'best_strategy': 'N/A'
             }
         
-        # Calculate metrics
-        wins = [e for e in completed if e.pnl > 0]
-        losses = [e for e in completed if e.pnl < 0]
-        
-        win_rate = (len(wins) / len(completed)) * 100 if completed else 0
-        avg_rr = sum(e.risk_reward for e in completed) / len(completed) if completed else 0
-        total_pnl = sum(e.pnl for e in completed)
-        
-        # Best strategy
-        strategy_pnl = {}
-        for e in completed:
-            if e.strategy not in strategy_pnl:
-                strategy_pnl[e.strategy] = {'pnl': 0, 'count': 0}
-            strategy_pnl[e.strategy]['pnl'] += e.pnl
-            strategy_pnl[e.strategy]['count'] += 1
-        
-        best_strategy = max(strategy_pnl.items(), key=lambda x: x[1]['pnl'])[0] if strategy_pnl else 'N/A'
+        # Best strategy (first one seen wins a tie)
+        best_strategy = max(strategy_pnl, key=strategy_pnl.get)
         
         return {
-            'total_trades': len(completed),
-            'open_positions': len([e for e in self.entries if e.exit_timestamp is None]),
-            'wins': len(wins),
-            'losses': len(losses),
-            'win_rate': win_rate,
-            'avg_rr': avg_rr,
+            'total_trades': completed,
+            'open_positions': open_positions,
+            'wins': wins,
+            'losses': losses,
+            'win_rate': (wins / completed) * 100,
+            'avg_rr': sum_rr / completed,
             'total_pnl': total_pnl,
-            'best_strategy': best_strategy,
-            'consecutive_losses': self.consecutive_losses,
-            'is_paused': self.is_paused(),
-            'pause_until': self.pause_until.isoformat() if self.pause_until else None
+            'best_strategy': best_strategy
         }
     
     def get_recent_trades(self, limit: int = 5) -> List[JournalEntry]:
@@ -276,16 +306,21 @@ class TradeJournal:
         """Save journal to file"""
         try:
             data = {
-                'entries': [asdict(e) for e in self.entries],
+                # Flat dataclass with JSON-ready fields: serialize the instance
+                # dicts directly instead of asdict()'s deep copies
+                'entries': [vars(e) for e in self.entries],
                 'consecutive_losses': self.consecutive_losses,
                 'pause_until': self.pause_until.isoformat() if self.pause_until else None,
                 'pause_reason': self.pause_reason
             }
             
-            with open(self.journal_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # Serialize in one go (compact output uses the C encoder) and
+            # write it with a single call
+            payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            with open(self.journal_file, 'wb') as f:
+                f.write(payload)
             
-            logger.debug(f"Journal saved to {self.journal_file}")
+            logger.debug("Journal saved to %s", self.journal_file)
         except Exception as e:
             logger.error(f"Error saving journal: {e}")
     
@@ -298,6 +333,9 @@ class TradeJournal:
                 
                 # Load entries
                 self.entries = [JournalEntry(**e) for e in data.get('entries', [])]
+                for index, entry in enumerate(self.entries):
+                    if entry.exit_timestamp is None:
+                        self._open_by_symbol.setdefault(entry.symbol, []).append(index)
                 
                 # Load pause state
                 self.consecutive_losses = data.get('consecutive_losses', 0)
@@ -310,3 +348,4 @@ class TradeJournal:
         except Exception as e:
             logger.error(f"Error loading journal: {e}")
             self.entries = []
+            self._open_by_symbol = {}
@@ -4,6 +4,11 @@ Formats trading results for Telegram
 """
 from typing import Dict
 
+# Section rules, built once
+HEAVY_RULE = "═" * 40
+LIGHT_RULE = "─" * 40
+TABLE_RULE = "-" * 42
+
 class TradingReportGenerator:
     """Generates trading performance reports"""
     
@@ -12,11 +17,13 @@ class TradingReportGenerator:
         lines = []
         
         # Header
-        lines.append("💰 *BÁO CÁO GIAO DỊCH THỬ NGHIỆM*")
-        lines.append("_Paper Trading với Chiến lược 3-Agent_")
-        lines.append("")
-        lines.append("═" * 40)
-        lines.append("")
+        lines.extend((
+            "💰 *BÁO CÁO GIAO DỊCH THỬ NGHIỆM*",
+            "_Paper Trading với Chiến lược 3-Agent_",
+            "",
+            HEAVY_RULE,
+            "",
+        ))
         
         # Capital summary
         initial = performance['initial_capital']
@@ -35,22 +42,26 @@ class TradingReportGenerator:
             emoji = "⚪"
             status = "HÒA VỐN"
         
-        lines.append("*📊 TỔNG KẾT DANH MỤC*")
-        lines.append(f"• Vốn ban đầu: *{initial:,.0f} VNĐ*")
-        lines.append(f"• Giá trị hiện tại: *{current:,.0f} VNĐ*")
-        lines.append(f"• Tiền mặt còn: *{performance['cash']:,.0f} VNĐ*")
-        lines.append("")
-        lines.append(f"{emoji} *{status}: {pnl:+,.0f} VNĐ ({return_pct:+.2f}%)*")
-        lines.append("")
-        lines.append("─" * 40)
-        lines.append("")
+        lines.extend((
+            "*📊 TỔNG KẾT DANH MỤC*",
+            f"• Vốn ban đầu: *{initial:,.0f} VNĐ*",
+            f"• Giá trị hiện tại: *{current:,.0f} VNĐ*",
+            f"• Tiền mặt còn: *{performance['cash']:,.0f} VNĐ*",
+            "",
+            f"{emoji} *{status}: {pnl:+,.0f} VNĐ ({return_pct:+.2f}%)*",
+            "",
+            LIGHT_RULE,
+            "",
+        ))
         
         # Positions
         if performance['positions']:
-            lines.append("*📁 VỊ THẾ ĐANG GIỮ*")
-            lines.append("```")
-            lines.append(f"{'Mã':<6} {'SL':<6} {'Giá TB':<8} {'Giá HT':<8} {'P&L %'}")
-            lines.append("-" * 42)
+            lines.extend((
+                "*📁 VỊ THẾ ĐANG GIỮ*",
+                "```",
+                f"{'Mã':<6} {'SL':<6} {'Giá TB':<8} {'Giá HT':<8} {'P&L %'}",
+                TABLE_RULE,
+            ))
             
             for symbol, pos in performance['positions'].items():
                 shares = pos['shares']
@@ -74,7 +85,7 @@ class TradingReportGenerator:
             lines.append("*📁 VỊ THẾ:* Không có vị thế mở")
             lines.append("")
         
-        lines.append("─" * 40)
+        lines.append(LIGHT_RULE)
         lines.append("")
         
         # Trading activity
@@ -102,9 +113,7 @@ class TradingReportGenerator:
                 
                 lines.append(f"  {line}")
         
-        lines.append("")
-        lines.append("═" * 40)
-        lines.append("")
+        lines.extend(("", HEAVY_RULE, ""))
         
         # Verdict
         lines.append("*🎯 KẾT LUẬN*")
@@ -120,9 +129,11 @@ class TradingReportGenerator:
         else:
             verdict = "Chiến lược cần xem xét lại! ⚠️"
         
-        lines.append(verdict)
-        lines.append("")
-        lines.append("⚠️ _Đây là mô phỏng paper trading._")
-        lines.append("_Kết quả thực tế có thể khác do slippage, phí..._")
+        lines.extend((
+            verdict,
+            "",
+            "⚠️ _Đây là mô phỏng paper trading._",
+            "_Kết quả thực tế có thể khác do slippage, phí..._",
+        ))
         
         return "\n".join(lines)
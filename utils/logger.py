@@ -1,9 +1,12 @@
 """
 Logging utility for Stock Analyzer Bot
 """
+import atexit
 import logging
+import queue
 import sys
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 
 def setup_logger(name='stock_analyzer', log_file='stock_analyzer.log'):
     """
@@ -40,7 +43,15 @@ def setup_logger(name='stock_analyzer', log_file='stock_analyzer.log'):
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
     
-    logger.addHandler(file_handler)
+    # File writes happen on a background listener thread, so logging from
+    # the trading loop only enqueues the record. The console stays
+    # synchronous to keep its output in order with print().
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Drain queued records on exit
+    
+    logger.addHandler(QueueHandler(log_queue))
     logger.addHandler(console_handler)
     
     return logger